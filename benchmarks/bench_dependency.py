@@ -0,0 +1,112 @@
+"""Scaling of the dependency resolver on synthetic param maps.
+
+Each synthetic param has up to three recipes (in priority order) using
+inputs or params further down the map, like derived variables of a
+large CABLE/JULES map. The previous recursive resolver is timed as
+well for the smaller sizes, its per-node cycle check grows
+exponentially with shared dependencies.
+
+    python benchmarks/bench_dependency.py --sizes 100 1000 10000
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+
+from met_preprocessor.dependency import find_cycle, resolve_calculations
+
+
+def synthetic_dependencies(n_params, n_inputs=20, seed=42):
+    rng = random.Random(seed)
+    inputs = [f"in{i}" for i in range(n_inputs)]
+    params = [f"p{i}" for i in range(n_params)]
+    dependencies = {}
+    for i, param in enumerate(params):
+        pool = params[i + 1 : i + 50] + inputs
+        dependencies[param] = [
+            (rng.sample(pool, min(len(pool), rng.randint(1, 3))), None)
+            for _ in range(rng.randint(1, 3))
+        ]
+    return dependencies, inputs[: n_inputs - 2]
+
+
+def legacy_order_load_dep(res, dependencies, input_list):
+    """Recursive resolver which restarts its scan after every resolution."""
+    for param, dep_list in dependencies.items():
+        for i, (deps, func) in enumerate(dep_list):
+            if set(deps).issubset(set(input_list)):
+                dependencies[param] = dependencies[param][:i]
+                for j, tup in enumerate(res):
+                    if tup[0] == param:
+                        res[j] = (param, deps, func)
+                        break
+                else:
+                    res = res + [(param, deps, func)]
+                return legacy_order_load_dep(res, dependencies, input_list + [param])
+    return res
+
+
+def legacy_cycle_check(node, visited, adj_list):
+    if visited.get(node):
+        return True
+    visited[node] = True
+    res = any([legacy_cycle_check(dep, visited, adj_list) for dep in adj_list.get(node, [])])
+    if not res:
+        del visited[node]
+    return res
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def bench(n_params, legacy_limit):
+    dependencies, inputs = synthetic_dependencies(n_params)
+    adj_list = {
+        k: list(set(itertools.chain.from_iterable(deps for deps, _ in v)))
+        for k, v in dependencies.items()
+    }
+    cycle_time, _ = timed(find_cycle, adj_list)
+    resolve_time, res = timed(resolve_calculations, dependencies, inputs)
+    result = {
+        "params": n_params,
+        "resolved": len(res),
+        "cycle_ms": round(cycle_time * 1000, 2),
+        "resolve_ms": round(resolve_time * 1000, 2),
+    }
+    if n_params <= legacy_limit:
+        legacy_cycle_time, _ = timed(
+            lambda: [legacy_cycle_check(node, {}, adj_list) for node in adj_list]
+        )
+        legacy_time, _ = timed(
+            legacy_order_load_dep, [], {k: list(v) for k, v in dependencies.items()}, inputs
+        )
+        result["legacy_cycle_ms"] = round(legacy_cycle_time * 1000, 2)
+        result["legacy_resolve_ms"] = round(legacy_time * 1000, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000, 3000, 10000])
+    parser.add_argument(
+        "--legacy-limit", type=int, default=100, help="Largest size to time the legacy resolver"
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * args.legacy_limit))
+    for n_params in args.sizes:
+        result = bench(n_params, args.legacy_limit)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print("  ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
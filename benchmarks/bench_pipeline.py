@@ -0,0 +1,213 @@
+"""End to end run_met benchmark on synthetic ERA5-Land shaped inputs.
+
+Generates hourly t2m, ssrd, strd, tp, u10, v10, sp and d2m files (one
+file per variable and day, named like the ERA5 files on Gadi), runs
+the full pipeline for each case with stage instrumentation and reports
+the total time, peak RSS and the slowest stages. Results are appended
+to a JSON lines file together with the git commit, so that runs of
+different commits can be compared with --compare.
+
+    python benchmarks/bench_pipeline.py --time 48 --lat 181 --lon 360
+    python benchmarks/bench_pipeline.py --compare
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+import yaml
+
+import met_preprocessor.met_preprocessing as met_preprocessing
+from met_preprocessor.instrument import MB, peak_rss, reset_peak_rss
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(REPO_ROOT, "benchmarks", "results.jsonl")
+# Config overrides of each benchmarked case
+CASES = {
+    "eager": {},
+    "lazy": {"lazy": True},
+    "window": {"time_window": "1D"},
+    "fast": {"fast_kernels": True, "calc_workers": 4},
+}
+# Number of stages reported per case
+TOP_STAGES = 5
+
+
+def synthetic_inputs(n_time, n_lat, n_lon, seed=42):
+    """ERA5-Land like fields, radiation and precipitation accumulated
+    since 00 UTC as in the original files."""
+    rng = np.random.default_rng(seed)
+    time = pd.date_range("1950-01-01", periods=n_time, freq="h")
+    lat = np.linspace(90, -90, n_lat)
+    lon = np.linspace(0, 360, n_lon, endpoint=False)
+    shape = (n_time, n_lat, n_lon)
+    hour = time.hour.values[:, None, None]
+    diurnal = np.sin(2 * np.pi * (hour - 6) / 24)
+    lat_factor = np.cos(np.deg2rad(lat))[None, :, None]
+
+    def accumulated(rate):
+        # Accumulate within each day, restarting at 00 UTC
+        days = np.broadcast_to(rate, shape).reshape(n_time // 24, 24, n_lat, n_lon)
+        return np.cumsum(days, axis=1).reshape(shape)
+
+    t2m = 250 + 40 * lat_factor + 5 * diurnal + rng.normal(0, 1, shape)
+    fields = {
+        "t2m": (t2m, "K"),
+        "d2m": (t2m - rng.uniform(1, 10, shape), "K"),
+        "sp": (101325 - rng.uniform(0, 20000, (1, n_lat, n_lon)) + rng.normal(0, 100, shape), "Pa"),
+        "u10": (rng.normal(0, 5, shape), "m s**-1"),
+        "v10": (rng.normal(0, 5, shape), "m s**-1"),
+        "ssrd": (accumulated(np.clip(diurnal, 0, None) * lat_factor * 3.6e6), "J m**-2"),
+        "strd": (accumulated(1.1e6 + 1e5 * lat_factor + rng.normal(0, 1e4, shape)), "J m**-2"),
+        "tp": (accumulated(rng.exponential(1e-4, shape)), "m"),
+    }
+    return {
+        var: xr.Dataset(
+            {var: (("time", "latitude", "longitude"), values.astype("float32"), {"units": units})},
+            coords={"time": time, "latitude": lat, "longitude": lon},
+        )
+        for var, (values, units) in fields.items()
+    }
+
+
+def write_inputs(datasets, directory):
+    """One file per variable and day, e.g. `t2m_era5-land_oper_sfc_19500101-19500101.nc`."""
+    for var, ds in datasets.items():
+        for day, day_ds in ds.groupby("time.date"):
+            stamp = pd.Timestamp(day).strftime("%Y%m%d")
+            day_ds.to_netcdf(os.path.join(directory, f"{var}_era5-land_oper_sfc_{stamp}-{stamp}.nc"))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(name, overrides, input_dir, work_dir, chunks, repeat=1):
+    """Best of `repeat` runs (the first run also pays for imports and caches)."""
+    return min(
+        (_run_case(name, overrides, input_dir, work_dir, chunks) for _ in range(repeat)),
+        key=lambda result: result["seconds"],
+    )
+
+
+def _run_case(name, overrides, input_dir, work_dir, chunks):
+    config = {
+        "directories": [input_dir],
+        "chunks": chunks,
+        "hourly_acc": ["SWDown", "LWDown", "Rainf"],
+        "output_file": os.path.join(work_dir, name),
+        "instrument_file": os.path.join(work_dir, f"{name}.jsonl"),
+        **overrides,
+    }
+    config_file = os.path.join(work_dir, f"{name}.yaml")
+    with open(config_file, "w") as file:
+        yaml.safe_dump(config, file)
+
+    open(config["instrument_file"], "w").close()
+    met_preprocessing.CONFIG_FILE_NAME = config_file
+    reset_peak_rss()
+    start = time.perf_counter()
+    met_preprocessing.run_met()
+    elapsed = time.perf_counter() - start
+    peak = peak_rss() / MB
+
+    stages = {}
+    with open(config["instrument_file"]) as file:
+        for line in file:
+            record = json.loads(line)
+            stages[record["stage"]] = stages.get(record["stage"], 0.0) + record["wall_s"]
+    return {
+        "case": name,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak, 1),
+        "stages": {stage: round(wall, 4) for stage, wall in stages.items()},
+    }
+
+
+def compare(results_file):
+    """Print stored runs per case and grid, oldest first."""
+    with open(results_file) as file:
+        results = [json.loads(line) for line in file]
+    key = lambda r: (r["case"], r["time"], r["lat"], r["lon"])
+    for case, n_time, n_lat, n_lon in sorted({key(r) for r in results}):
+        print(f"{case} ({n_time}x{n_lat}x{n_lon})")
+        runs = [r for r in results if key(r) == (case, n_time, n_lat, n_lon)]
+        first = runs[0]["seconds"]
+        for r in runs:
+            print(
+                f"  {r['date']} {r['commit'] or '-':>9} {r['seconds']:>9.3f}s "
+                f"{r['seconds'] / first:>6.2f}x {r['peak_rss_mb']:>9.1f} MB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--time", type=int, default=48, help="Hours (whole days)")
+    parser.add_argument("--lat", type=int, default=181)
+    parser.add_argument("--lon", type=int, default=360)
+    parser.add_argument("--chunk-time", type=int, default=24)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=2, help="Best of repeated runs")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON lines file of past runs")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--compare", action="store_true", help="Compare stored runs and exit")
+    parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+    if args.time % 24:
+        parser.error("--time must be a whole number of days")
+
+    if args.compare:
+        compare(args.results)
+        return
+
+    # run_met reads param_map.yaml relative to the repo root
+    os.chdir(REPO_ROOT)
+    chunks = {"time": args.chunk_time}
+    with tempfile.TemporaryDirectory() as input_dir, tempfile.TemporaryDirectory() as work_dir:
+        write_inputs(synthetic_inputs(args.time, args.lat, args.lon), input_dir)
+        n_bytes = sum(
+            os.path.getsize(os.path.join(input_dir, f)) for f in os.listdir(input_dir)
+        )
+        print(f"Inputs: {args.time}x{args.lat}x{args.lon}, {n_bytes / 1e6:.1f} MB")
+
+        meta = {
+            "commit": git_commit(),
+            "date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M"),
+            "time": args.time,
+            "lat": args.lat,
+            "lon": args.lon,
+        }
+        results = [
+            dict(meta, **run_case(case, CASES[case], input_dir, work_dir, chunks, args.repeat))
+            for case in args.cases
+        ]
+
+    if not args.no_save:
+        with open(args.results, "a") as file:
+            for result in results:
+                file.write(json.dumps(result) + "\n")
+
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+            continue
+        top = sorted(result["stages"].items(), key=lambda item: -item[1])[:TOP_STAGES]
+        print(
+            f"{result['case']:>8} {result['seconds']:>9.3f}s {result['peak_rss_mb']:>9.1f} MB  "
+            + ", ".join(f"{stage} {wall:.3f}s" for stage, wall in top)
+        )
+
+
+if __name__ == "__main__":
+    main()
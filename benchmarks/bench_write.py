@@ -0,0 +1,102 @@
+"""Write throughput and compression ratio of output encodings.
+
+Writes a synthetic, temperature like ERA5 cube with each encoding
+setting and reports MB/s (uncompressed bytes over write time) and the
+compression ratio (uncompressed bytes over file size).
+
+    python benchmarks/bench_write.py --time 24 --lat 721 --lon 1440
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from met_preprocessor.writer import write_outputs
+
+SETTINGS = {
+    "none": {"zlib": False},
+    "zlib-1": {"zlib": True, "complevel": 1, "shuffle": True},
+    "zlib-5": {"zlib": True, "complevel": 5, "shuffle": True},
+    "zlib-9": {"zlib": True, "complevel": 9, "shuffle": True},
+    "zstd-1": {"compression": "zstd", "complevel": 1, "shuffle": True},
+    "zlib-1-lsd2": {"zlib": True, "complevel": 1, "shuffle": True, "least_significant_digit": 2},
+    "zlib-1-bitround": {
+        "zlib": True,
+        "complevel": 1,
+        "shuffle": True,
+        "significant_digits": 10,
+        "quantize_mode": "BitRound",
+    },
+}
+
+
+def synthetic_cube(n_time, n_lat, n_lon, dtype="float32"):
+    """Smooth diurnal/latitudinal temperature field with small noise."""
+    rng = np.random.default_rng(42)
+    time = pd.date_range("1950-01-01", periods=n_time, freq="h")
+    lat = np.linspace(90, -90, n_lat)
+    lon = np.linspace(0, 360, n_lon, endpoint=False)
+    field = (
+        288
+        - 30 * np.abs(np.sin(np.deg2rad(lat)))[None, :, None]
+        + 5 * np.sin(2 * np.pi * np.arange(n_time) / 24)[:, None, None]
+        + rng.normal(0, 0.5, (n_time, n_lat, n_lon))
+    ).astype(dtype)
+    return xr.Dataset(
+        {"Tair": (("time", "latitude", "longitude"), field, {"units": "kelvin"})},
+        coords={"time": time, "latitude": lat, "longitude": lon},
+    )
+
+
+def bench(dataset, settings, chunksizes=None):
+    n_bytes = dataset["Tair"].nbytes
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, encoding in settings.items():
+            encoding = dict(encoding)
+            if chunksizes:
+                encoding["chunksizes"] = chunksizes
+            output_file = os.path.join(tmpdir, name)
+            start = time.perf_counter()
+            (file_name,) = write_outputs(
+                dataset, output_file, output_encoding={"default": encoding}
+            )
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "setting": name,
+                    "seconds": round(elapsed, 3),
+                    "MB/s": round(n_bytes / 1e6 / elapsed, 1),
+                    "ratio": round(n_bytes / os.path.getsize(file_name), 2),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--time", type=int, default=24)
+    parser.add_argument("--lat", type=int, default=721)
+    parser.add_argument("--lon", type=int, default=1440)
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--chunk", type=int, nargs=3, metavar=("TIME", "LAT", "LON"))
+    parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    dataset = synthetic_cube(args.time, args.lat, args.lon, args.dtype)
+    chunksizes = dict(zip(["time", "latitude", "longitude"], args.chunk or []))
+    print(f"Cube: {dict(dataset.sizes)} {args.dtype}, {dataset['Tair'].nbytes / 1e6:.1f} MB")
+    for result in bench(dataset, SETTINGS, chunksizes):
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print("{setting:>16} {seconds:>8}s {MB/s:>8} MB/s {ratio:>6}x".format(**result))
+
+
+if __name__ == "__main__":
+    main()
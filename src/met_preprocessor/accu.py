@@ -1,22 +1,40 @@
 from xarray import DataArray
-import xarray as xr
+import numpy as np
 import pandas as pd
 
+# Accumulations reset at least daily, so one day of preceding data
+# is enough to de-accumulate any time window.
+ACCUMULATION_PERIOD = pd.Timedelta(days=1)
 
-def daily_to_hourly_acc(da: DataArray) -> DataArray:
-    gpd = da.groupby("time.date")
-    diff_da = xr.concat(
-        [
-            gpd.first(keep_attrs=True).rename({"date": "time"}),
-            gpd.apply(lambda x: x.diff("time")),
-        ],
-        dim="time",
+DAILY_RESET = (0,)
+
+
+def accumulation_resets(time: DataArray, reset_hours=DAILY_RESET) -> np.ndarray:
+    """Mask of the time steps starting a new accumulation period.
+
+    A new period starts at every `reset_hours` hour of the day, so the
+    first step at/after each reset hour (and the very first step) is
+    a reset. Works on both numpy and cftime datetimes.
+    """
+    reset_hours = sorted(reset_hours)
+    # Shift time so that the first reset falls at midnight, each period
+    # is then identified by the (day, reset slot) pair.
+    shifted = time - pd.Timedelta(hours=reset_hours[0])
+    day = shifted.dt.floor("D").values
+    slot = np.searchsorted(
+        [h - reset_hours[0] for h in reset_hours], shifted.dt.hour.values, side="right"
     )
+    resets = np.ones(time.size, dtype=bool)
+    resets[1:] = (day[1:] != day[:-1]) | (slot[1:] != slot[:-1])
+    return resets
 
-    # Internally, TimeStamp is being converted to datetime64
-    # on groupby if timestamp is 00:00:00.
-    diff_da['time'] = pd.DatetimeIndex(diff_da['time'].values)
 
+def daily_to_hourly_acc(da: DataArray, reset_hours=DAILY_RESET) -> DataArray:
+    """De-accumulate hourly values accumulated since the last reset
+    (midnight by default). Values at a reset are kept as they are, other
+    steps become the difference with the previous step."""
+    resets = DataArray(accumulation_resets(da["time"], reset_hours), dims="time")
+    hourly_da = da.where(resets, da - da.shift(time=1, fill_value=0))
 
-    diff_da.attrs["units"] = f"{diff_da.attrs['units']} hr**-1"
-    return diff_da
+    hourly_da.attrs = dict(da.attrs, units=f"{da.attrs['units']} hr**-1")
+    return hourly_da
@@ -0,0 +1,220 @@
+"""Run the preprocessor for many configs or sites in warm worker processes.
+
+    python -m met_preprocessor.batch site_a.yaml site_b.yaml --workers 4
+    python -m met_preprocessor.batch --sites sites.yaml --workers 8 --report batch.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+import dask
+import yaml
+from met_preprocessor.executor import process_pool
+from met_preprocessor.met_preprocessing import PARAM_MAP_FILE_NAME, run_config
+from met_preprocessor.plan import load_param_map
+from met_preprocessor.unit_conv import setup_registry
+
+# Replaced by the site name in the string entries of a manifest's defaults
+SITE_NAME = "{name}"
+
+
+def _load_yaml(file_name: str) -> dict:
+    with open(file_name) as file:
+        return yaml.safe_load(file)
+
+
+def _with_site_name(value, name: str):
+    if isinstance(value, str):
+        return value.replace(SITE_NAME, name)
+    if isinstance(value, list):
+        return [_with_site_name(item, name) for item in value]
+    return value
+
+
+def config_jobs(config_files: list[str]) -> list[tuple]:
+    """`(name, config)` jobs of config files, named after the files."""
+    return [
+        (os.path.splitext(os.path.basename(file_name))[0], _load_yaml(file_name))
+        for file_name in config_files
+    ]
+
+
+def site_jobs(manifest_file: str) -> list[tuple]:
+    """`(name, config)` jobs of a site manifest, e.g.
+
+        config: base.yaml  # or inline `defaults`
+        defaults:
+          output_file: /scratch/sites/{name}
+        sites:
+          - name: AU-Tum
+            directories: [/data/AU-Tum]
+
+    Each site updates the defaults (read from `config`, then updated with
+    `defaults`), in which `{name}` is replaced by the site's name."""
+    manifest = _load_yaml(manifest_file)
+    defaults = _load_yaml(manifest["config"]) if manifest.get("config") else {}
+    defaults.update(manifest.get("defaults") or {})
+    jobs = []
+    for site in manifest["sites"]:
+        name = site["name"]
+        config = {key: _with_site_name(value, name) for key, value in defaults.items()}
+        config.update({key: value for key, value in site.items() if key != "name"})
+        jobs.append((name, config))
+    return jobs
+
+
+def warm_worker() -> None:
+    """Set up the unit registry once per worker, shared by all its jobs
+    (as are the resolved calculation and unit conversion plans)."""
+    setup_registry()
+
+
+def run_job(name: str, config: dict, param_map: dict, threads=None) -> dict:
+    """Run a job (creating its output directory) computing with `threads`
+    dask threads if given, returns its report: status, wall and CPU time,
+    and the error of a failed job. Errors are reported rather than raised,
+    so that a failing job does not stop the others."""
+    report = {"name": name, "output_file": config.get("output_file"), "pid": os.getpid()}
+    cpu, wall = time.process_time(), time.perf_counter()
+    try:
+        if config.get("output_file"):
+            os.makedirs(os.path.dirname(config["output_file"]) or ".", exist_ok=True)
+        scheduler = dask.config.set(scheduler="threads", num_workers=threads) if threads else nullcontext()
+        with scheduler:
+            result = run_config(config, param_map)
+        if result is not None:
+            result.close()
+        report["status"] = "ok"
+    except Exception as error:
+        report["status"] = "failed"
+        report["error"] = f"{type(error).__name__}: {error}"
+        print(f"Batch: Job {name} raised\n{traceback.format_exc()}")
+    report["wall_s"] = time.perf_counter() - wall
+    report["cpu_s"] = time.process_time() - cpu
+    return report
+
+
+def _failed(name: str, error: Exception) -> dict:
+    """Report of a job whose worker did not return (e.g. it crashed)."""
+    return {
+        "name": name,
+        "status": "failed",
+        "error": f"{type(error).__name__}: {error}",
+        "wall_s": None,
+        "cpu_s": None,
+    }
+
+
+def _run_in_pool(jobs: list[tuple], indices: list[int], param_map: dict, workers: int, threads, finish):
+    """Run the jobs of `indices` in a new pool, returns the ones left
+    unfinished when a worker crashed (e.g. killed when out of memory),
+    which breaks the pool."""
+    unfinished = []
+    with process_pool(workers, initializer=warm_worker) as pool:
+        futures = {pool.submit(run_job, *jobs[i], param_map, threads): i for i in indices}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                finish(i, future.result())
+            except BrokenProcessPool:
+                unfinished.append(i)
+            except Exception as error:
+                finish(i, _failed(jobs[i][0], error))
+    return sorted(unfinished)
+
+
+def run_batch(
+    jobs: list[tuple], param_map: dict, workers: int = 1, report_file=None, threads=None
+) -> list[dict]:
+    """Reports of the `(name, config)` jobs, in job order.
+
+    With more than one worker, jobs are fanned out to a pool of `workers`
+    spawned processes, each running many jobs so that imports, the unit
+    registry and the plans are only set up once per worker, and computing
+    with `threads` dask threads (default `1`, as tiles do). Otherwise they
+    run one after the other in this process, with dask's default threads
+    unless `threads` is given. Each finished job is printed and appended
+    to `report_file` as a JSON line.
+
+    When a worker crashes, the jobs which did not finish are run in a new
+    pool. Jobs start in job order, so only the first `workers` of them can
+    have been running in the crashed worker: these are run again one per
+    process, and the one crashing again is reported as failed."""
+    reports = {}
+
+    def finish(i, report):
+        status = report["status"]
+        if report["wall_s"] is not None:
+            status += f" in {report['wall_s']:.1f} s"
+        print(f"Batch: Job {report['name']} {status}")
+        if report_file is not None:
+            with open(report_file, "a") as file:
+                file.write(json.dumps(report) + "\n")
+        reports[i] = report
+
+    if workers <= 1:
+        warm_worker()
+        for i, (name, config) in enumerate(jobs):
+            finish(i, run_job(name, config, param_map, threads))
+        return [reports[i] for i in range(len(jobs))]
+
+    threads = threads or 1
+    pending = list(range(len(jobs)))
+    while pending:
+        unfinished = _run_in_pool(jobs, pending, param_map, workers, threads, finish)
+        suspects, pending = unfinished[:workers], unfinished[workers:]
+        if suspects:
+            names = ", ".join(jobs[i][0] for i in suspects)
+            print(f"Batch: A worker crashed, running {names} again on their own")
+        for i in suspects:
+            if _run_in_pool(jobs, [i], param_map, 1, threads, finish):
+                finish(i, _failed(jobs[i][0], BrokenProcessPool("The worker crashed running this job")))
+    return [reports[i] for i in range(len(jobs))]
+
+
+def batch_summary(reports: list[dict]) -> str:
+    """Table of the jobs, slowest first, and the totals."""
+    width = max([len("job")] + [len(report["name"]) for report in reports])
+    lines = [f"{'job':<{width}} {'status':>7} {'wall s':>9} {'cpu s':>9}  error"]
+    for report in sorted(reports, key=lambda report: -(report["wall_s"] or 0)):
+        wall = "-" if report["wall_s"] is None else f"{report['wall_s']:.3f}"
+        cpu = "-" if report["cpu_s"] is None else f"{report['cpu_s']:.3f}"
+        lines.append(
+            f"{report['name']:<{width}} {report['status']:>7} {wall:>9} {cpu:>9}  {report.get('error', '')}"
+        )
+    failed = sum(report["status"] != "ok" for report in reports)
+    wall = sum(report["wall_s"] or 0 for report in reports)
+    lines.append(f"{len(reports)} jobs, {failed} failed, {wall:.3f} s of job time")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("configs", nargs="*", help="Config files, one job each")
+    parser.add_argument("--sites", help="Site manifest, one job per site")
+    parser.add_argument("--param-map", default=PARAM_MAP_FILE_NAME)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--threads", type=int, help="Dask threads of each job (default 1 with workers)")
+    parser.add_argument("--report", help="JSON lines file the job reports are appended to")
+    args = parser.parse_args(argv)
+
+    jobs = config_jobs(args.configs)
+    if args.sites:
+        jobs += site_jobs(args.sites)
+    if not jobs:
+        parser.error("no configs or sites given")
+
+    print(f"Batch: Running {len(jobs)} jobs with {args.workers} workers")
+    reports = run_batch(jobs, load_param_map(args.param_map), args.workers, args.report, args.threads)
+    print(batch_summary(reports))
+    return 1 if any(report["status"] != "ok" for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
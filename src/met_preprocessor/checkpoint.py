@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+from met_preprocessor.utils import write_json_atomic
+from met_preprocessor.writer import OUTPUT_EXTENSIONS, output_times
+
+# Checkpoints of another version can not be resumed
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+# Config entries which do not change the outputs, runs can be resumed
+# with other values
+RESUMABLE_KEYS = {
+    "checkpoint",
+    "checkpoint_file",
+    "resume",
+    "output_file",
+    "instrument",
+    "instrument_file",
+    "profile_stage",
+    "profile_file",
+    "plan_cache_dir",
+    "manifest_file",
+    "discovery_workers",
+    "header_index",
+    "index_dir",
+    "parallel",
+    "calc_workers",
+    "tile_workers",
+    "tile_threads",
+    "tile_scheduler",
+    "tile_cluster",
+}
+
+
+def checkpoint_file_name(config) -> str:
+    return config.get("checkpoint_file") or f"{config['output_file']}{CHECKPOINT_SUFFIX}"
+
+
+def config_key(config, param_map) -> str:
+    """Hash of the config entries and param map the outputs depend on."""
+    content = json.dumps(
+        [{k: v for k, v in config.items() if k not in RESUMABLE_KEYS}, param_map],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _remove(file_name: str) -> None:
+    if os.path.isdir(file_name):
+        shutil.rmtree(file_name)
+    elif os.path.exists(file_name):
+        os.remove(file_name)
+
+
+class Checkpoint:
+    """Manifest of the completed units of a run: an output file written for
+    a time window (None for the whole period) of a tile (None without
+    tiling). Each unit records the file's time steps once written, so that
+    the outputs can be checked before resuming.
+
+    The manifest is saved after every unit. With `resume`, the units of a
+    previous run with the same `key` are reused, the ones of outputs
+    failing `verify` are dropped (and their outputs removed)."""
+
+    def __init__(self, file_name: str, key: str, resume: bool = False) -> None:
+        self.file_name = file_name
+        self.key = key
+        self.units = {}
+        if resume and os.path.exists(file_name):
+            with open(file_name) as file:
+                content = json.load(file)
+            if content.get("version") != CHECKPOINT_VERSION or content.get("key") != self.key:
+                raise Exception(
+                    f"Checkpoint {file_name} is of another configuration, remove it to start over"
+                )
+            self.units = content["units"]
+            self.verify()
+            print(f"Checkpoint: Resuming with {len(self.units)} completed units")
+
+    @staticmethod
+    def unit_key(output: str, window=None, tile=None) -> str:
+        return json.dumps([output, None if window is None else str(window), tile])
+
+    def is_done(self, output: str, window=None, tile=None) -> bool:
+        return self.unit_key(output, window, tile) in self.units
+
+    def time_steps(self, output: str) -> int:
+        """Time steps of `output` once its last completed unit was written."""
+        return max(
+            (unit["time_steps"] for unit in self.units.values() if unit["output"] == output),
+            default=0,
+        )
+
+    def complete(self, output: str, window=None, tile=None) -> None:
+        times = output_times(output)
+        if times is None:
+            raise Exception(f"Checkpoint: {output} can not be read after writing it")
+        self.units[self.unit_key(output, window, tile)] = {
+            "output": output,
+            "time_steps": len(times),
+            "last_time": str(times[-1]) if len(times) else None,
+        }
+        self.save()
+
+    def discard(self, outputs) -> None:
+        """Forget the units of `outputs` (e.g. removed intermediate files)."""
+        self.units = {k: u for k, u in self.units.items() if u["output"] not in outputs}
+        self.save()
+
+    def verify(self) -> None:
+        """Drop the units of outputs which no longer hold the time steps
+        recorded (e.g. removed, truncated or unreadable). Appends to NetCDF
+        outputs resume at the recorded step, so steps written by an
+        interrupted append are fine, Zarr stores must match exactly."""
+        for output in {unit["output"] for unit in self.units.values()}:
+            n_times = self.time_steps(output)
+            last_time = next(
+                unit["last_time"]
+                for unit in self.units.values()
+                if unit["output"] == output and unit["time_steps"] == n_times
+            )
+            times = output_times(output)
+            valid = (
+                times is not None
+                and len(times) >= n_times
+                and (n_times == 0 or pd.Timestamp(str(times[n_times - 1])) == pd.Timestamp(last_time))
+                and (not output.endswith(OUTPUT_EXTENSIONS["zarr"]) or len(times) == n_times)
+            )
+            if not valid:
+                print(f"Checkpoint: {output} does not match the checkpoint, redoing it")
+                self.units = {k: u for k, u in self.units.items() if u["output"] != output}
+                _remove(output)
+        self.save()
+
+    def save(self) -> None:
+        content = {"version": CHECKPOINT_VERSION, "key": self.key, "units": self.units}
+        write_json_atomic(self.file_name, content)
+
+
+def open_checkpoint(config, param_map) -> Checkpoint | None:
+    """Checkpoint of the run if `checkpoint` or `resume` is configured."""
+    if not (config.get("checkpoint") or config.get("resume")):
+        return None
+    return Checkpoint(
+        checkpoint_file_name(config), config_key(config, param_map), config.get("resume", False)
+    )
@@ -0,0 +1,16 @@
+import numpy as np
+
+
+def constant_field(value, shape: tuple[int, ...]) -> np.ndarray:
+    """Read-only array of `shape` filled with `value`, stored as the
+    single value (a broadcast view) rather than one copy per element."""
+    return np.broadcast_to(np.asarray(value), shape)
+
+
+def is_constant_field(data) -> bool:
+    """Whether `data` is a broadcast view of a single value."""
+    return isinstance(data, np.ndarray) and data.size > 1 and not any(data.strides)
+
+
+def constant_value(data):
+    return data.flat[0]
@@ -1,6 +1,23 @@
 import met_preprocessor.standard_param as standard_param
 import met_preprocessor.opt_param as opt_param
+import heapq
 import itertools
+import time
+from collections import defaultdict, deque
+
+# Module holding the calculation functions of each param type
+PARAM_TYPE_MODULES = {
+    "standard": standard_param,
+    "optional": opt_param,
+}
+
+
+def calculation_func(param_info, func_name: str):
+    """Calculation function `func_name` of a param."""
+    try:
+        return getattr(PARAM_TYPE_MODULES[param_info["type"]], func_name)
+    except KeyError:
+        raise Exception("Not yet defined for just conversion params")
 
 
 def process_dependencies(param_map):
@@ -10,16 +27,10 @@ def process_dependencies(param_map):
     for param, param_info in param_map.items():
         ans = []
         for pi_calc in param_info.get("calc", []):
-            param_type = {
-                "standard" : standard_param,
-                "optional" : opt_param
-            }
-            try:
-                func = getattr(param_type[param_info["type"]], pi_calc["func"])
-            except KeyError:
-                raise Exception("Not yet defined for just conversion params")
-
-            parsed_deps = pi_calc.get("deps", "").split(",")
+            func = calculation_func(param_info, pi_calc["func"])
+
+            # Recipes without deps (e.g. constants) are always calculable
+            parsed_deps = pi_calc["deps"].split(",") if pi_calc.get("deps") else []
             ans.append((parsed_deps, func))
         dependencies[param] = ans
 
@@ -42,39 +53,133 @@ def cycle_check(node: str, visited: dict[str, bool], adj_list: dict[str, list[st
     return res
 
 
-def replace_tup(tup_list, val, new_tup):
-    for i, tup in enumerate(tup_list):
-        if tup[0] == val:
-            tup_list[i] = new_tup
-            return tup_list
-    return tup_list + [new_tup]
-
-
-def order_load_dep(res, dependencies, input_list):
+def find_cycle(adj_list: dict[str, list[str]]) -> str | None:
+    """Node on a cycle of the graph, if any, from a single DFS visiting
+    every node once."""
+    # 1: on the current DFS path, 2: fully explored
+    state = {}
+    for root in adj_list:
+        if state.get(root):
+            continue
+        state[root] = 1
+        stack = [(root, iter(adj_list.get(root, [])))]
+        while stack:
+            node, deps = stack[-1]
+            dep = next(deps, None)
+            if dep is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(dep) == 1:
+                return dep
+            elif not state.get(dep):
+                state[dep] = 1
+                stack.append((dep, iter(adj_list.get(dep, []))))
+    return None
+
+
+def resolve_calculations(dependencies, input_list):
     """
     Given a Directed Acyclic Graph, convert which order to calculate values.
-    Eg: input_list = {1, 3}  dependencies = {2 : [[1, 4], [1, 3]], 4 : 1}
-    Here answer should be {4 : [1] , 2 : [1, 4]} based on priority
+    Eg: input_list = {1, 3}  dependencies = {2 : [[1, 4], [1, 3]], 4 : [[1]]}
+    Here answer should be [(4, [1]), (2, [1, 4])] based on priority
+
+    1. Worklist over the recipes: each recipe counts its missing deps and
+       its param becomes available when the first recipe has none left.
+    2. Every calculable param takes its highest priority recipe whose
+       deps are all available.
+    3. The chosen recipes are ordered topologically, ties keep the
+       order of `dependencies`.
     """
+    available = set(input_list)
+    missing = {}
+    waiting = defaultdict(list)
+    queue = deque()
     for param, dep_list in dependencies.items():
-        for i, (deps, func) in enumerate(dep_list):
-            if set(deps).issubset(set(input_list)):
-                # Remove on/after param
-                dependencies[param] = dependencies[param][:i]
-                # Replace param in res if present otherwise append
-                updated_res = replace_tup(res, param, (param, deps, func))
-                return order_load_dep(updated_res, dependencies, input_list + [param])
-    # If no extra dependencies found, then return the accumulated result
+        for i, (deps, _) in enumerate(dep_list):
+            unmet = set(deps) - available
+            missing[param, i] = len(unmet)
+            for dep in unmet:
+                waiting[dep].append((param, i))
+            if not unmet:
+                queue.append(param)
+
+    calculable = set()
+    while queue:
+        param = queue.popleft()
+        if param in calculable:
+            continue
+        calculable.add(param)
+        if param in available:
+            continue
+        available.add(param)
+        for waiting_param, i in waiting.pop(param, []):
+            missing[waiting_param, i] -= 1
+            if missing[waiting_param, i] == 0:
+                queue.append(waiting_param)
+
+    chosen = {}
+    for param, dep_list in dependencies.items():
+        if param in calculable:
+            chosen[param] = next(
+                (deps, func)
+                for i, (deps, func) in enumerate(dep_list)
+                if missing[param, i] == 0
+            )
+
+    priority = {param: i for i, param in enumerate(chosen)}
+    n_pending = {param: 0 for param in chosen}
+    dependants = defaultdict(list)
+    for param, (deps, _) in chosen.items():
+        for dep in set(deps):
+            if dep in chosen and dep != param:
+                n_pending[param] += 1
+                dependants[dep].append(param)
+
+    ready = [priority[param] for param, n in n_pending.items() if n == 0]
+    heapq.heapify(ready)
+    order = list(chosen)
+    res = []
+    while ready:
+        param = order[heapq.heappop(ready)]
+        res.append((param, *chosen[param]))
+        for dependant in dependants[param]:
+            n_pending[dependant] -= 1
+            if n_pending[dependant] == 0:
+                heapq.heappush(ready, priority[dependant])
     return res
 
 
+def calculation_levels(calculations):
+    """Groups resolved calculations into the levels of their DAG.
+    A calculation only depends on inputs and on calculations of earlier
+    levels, so the calculations within a level are independent."""
+    depth = {}
+    levels = []
+    for param, deps, func in calculations:
+        level = max((depth[dep] + 1 for dep in deps if dep in depth), default=0)
+        depth[param] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append((param, deps, func))
+    return levels
+
+
+def order_load_dep(res, dependencies, input_list):
+    """Appends the calculations resolved from `input_list` to `res`."""
+    return res + resolve_calculations(dependencies, input_list)
+
+
 def generate_calculations(dataset, param_map):
+    start = time.perf_counter()
     pd = process_dependencies(param_map)
     is_cycle_chain = {
         k: list(set(itertools.chain.from_iterable([vi[0] for vi in v])))
         for k, v in pd.items()
     }
-    for node in pd.keys():
-        if cycle_check(node, {}, is_cycle_chain):
-            raise Exception(f"Circular dependency detected near {node}")
-    return order_load_dep([], pd, list(dataset.keys()) + ["none"])
+    node = find_cycle(is_cycle_chain)
+    if node is not None:
+        raise Exception(f"Circular dependency detected near {node}")
+    calculations = resolve_calculations(pd, list(dataset.keys()) + ["none"])
+    elapsed = time.perf_counter() - start
+    print(f"Resolved {len(calculations)} calculations in {elapsed * 1000:.2f} ms")
+    return calculations
@@ -0,0 +1,178 @@
+import fnmatch
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pandas as pd
+from met_preprocessor.loader import DATE_SUFFIX
+from met_preprocessor.utils import write_json_atomic
+
+NC_SUFFIX = ".nc"
+# Year directories of the ERA5 trees, e.g. `.../reanalysis/2t/1950`
+YEAR_DIR = re.compile(r"^\d{4}$")
+# Manifests of another version are ignored, their directories listed again
+MANIFEST_VERSION = 1
+# Listings of directories modified more recently than this are not kept,
+# further changes within the file system's mtime resolution would go unnoticed
+MTIME_MARGIN_NS = 2 * 10**9
+
+
+def file_time_range(file_name: str):
+    """`(start, end)` period covered by a file according to its trailing
+    date stamp, `end` being exclusive, e.g. `*_19500101-19500131.nc` covers
+    January 1950 and `*_195001.nc` the month. None without date stamp."""
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    match = DATE_SUFFIX.search(stem)
+    if match is None:
+        return None
+    first, last = match.group(1), match.group(2) or match.group(1)
+    try:
+        start, end = (
+            pd.to_datetime(stamp, format="%Y%m%d" if len(stamp) == 8 else "%Y%m")
+            for stamp in [first, last]
+        )
+    except ValueError:
+        # Digits that are not a date, e.g. a 7 digit run number
+        return None
+    return start, end + (pd.DateOffset(days=1) if len(last) == 8 else pd.DateOffset(months=1))
+
+
+def parse_time_range(time_range):
+    """`[start, end]` of the config as Timestamps, None for open ends."""
+    if time_range is None:
+        return None
+    start, end = time_range
+    return (
+        pd.Timestamp(start) if start is not None else None,
+        pd.Timestamp(end) if end is not None else None,
+    )
+
+
+def overlaps(period, time_range) -> bool:
+    """Whether the `[start, end)` file `period` overlaps the inclusive
+    `time_range`, unknown periods always do."""
+    if period is None or time_range is None:
+        return True
+    start, end = time_range
+    return (end is None or period[0] <= end) and (start is None or period[1] > start)
+
+
+def keep_directory(name: str, time_range) -> bool:
+    """Year directories outside of the time range are not scanned."""
+    if time_range is None or not YEAR_DIR.match(name):
+        return True
+    year = pd.Timestamp(year=int(name), month=1, day=1)
+    return overlaps((year, year + pd.DateOffset(years=1)), time_range)
+
+
+def keep_file(file_name: str, time_range=None, pattern=None, regex=None) -> bool:
+    """Filter of discovered files: `pattern` is a glob matched against the
+    file name, `regex` is searched in the full path."""
+    if pattern is not None and not fnmatch.fnmatch(os.path.basename(file_name), pattern):
+        return False
+    if regex is not None and re.search(regex, file_name) is None:
+        return False
+    return overlaps(file_time_range(file_name), time_range)
+
+
+class Manifest:
+    """Listings (`.nc` files and subdirectories) of scanned directories,
+    reused as long as the directory's modification time is unchanged.
+    Adding, removing or renaming an entry of a directory changes its
+    modification time, so only changed directories are listed again."""
+
+    def __init__(self, file_name: str | None = None) -> None:
+        self.file_name = file_name
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+        if file_name is not None and os.path.exists(file_name):
+            with open(file_name) as file:
+                content = json.load(file)
+            if content.get("version") == MANIFEST_VERSION:
+                self.entries = content["directories"]
+
+    def listing(self, directory: str):
+        """`(file names, subdirectory names)` of `directory`."""
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with self._lock:
+            entry = self.entries.get(directory)
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            return entry["files"], entry["directories"]
+
+        files, directories = [], []
+        with os.scandir(directory) as it:
+            for dir_entry in it:
+                # As os.walk, symbolic links to directories are not followed
+                if dir_entry.is_dir(follow_symlinks=False):
+                    directories.append(dir_entry.name)
+                elif dir_entry.name.endswith(NC_SUFFIX):
+                    files.append(dir_entry.name)
+        if time.time_ns() - mtime_ns > MTIME_MARGIN_NS:
+            with self._lock:
+                self.entries[directory] = {
+                    "mtime_ns": mtime_ns,
+                    "files": sorted(files),
+                    "directories": sorted(directories),
+                }
+                self.changed = True
+        return files, directories
+
+    def save(self) -> None:
+        if self.file_name is None or not self.changed:
+            return
+        write_json_atomic(self.file_name, {"version": MANIFEST_VERSION, "directories": self.entries})
+        self.changed = False
+
+
+def _scan(manifest: Manifest, directory: str):
+    if not os.path.isdir(directory):
+        print(f"Discovery: Skipping missing directory {directory}")
+        return directory, [], []
+    return (directory, *manifest.listing(directory))
+
+
+def discover_files(
+    paths,
+    time_range=None,
+    pattern=None,
+    regex=None,
+    manifest_file=None,
+    max_workers: int = 8,
+) -> list[str]:
+    """Sorted `.nc` files of `paths` (directories scanned recursively, or
+    files themselves) passing the `keep_file` filters.
+
+    Directories are listed concurrently on `max_workers` threads. Files
+    whose date stamp is outside `time_range` are dropped and year
+    directories outside of it are not even listed. With a
+    `manifest_file`, listings are persisted and reused by later runs."""
+    time_range = parse_time_range(time_range)
+    manifest = Manifest(manifest_file)
+
+    candidates = [path for path in paths if os.path.isfile(path)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {
+            pool.submit(_scan, manifest, path)
+            for path in paths
+            if not os.path.isfile(path)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory, files, directories = future.result()
+                candidates += [os.path.join(directory, name) for name in files]
+                pending |= {
+                    pool.submit(_scan, manifest, os.path.join(directory, name))
+                    for name in directories
+                    if keep_directory(name, time_range)
+                }
+    manifest.save()
+
+    return sorted(
+        file_name
+        for file_name in set(candidates)
+        if keep_file(file_name, time_range, pattern, regex)
+    )
@@ -0,0 +1,39 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def _run_calculation(calculate, dataset, param, deps, func, upstream):
+    if deps == []:
+        dep_attrs = [dataset.coords, dataset.sizes]
+    else:
+        dep_attrs = [
+            upstream[dep].result() if dep in upstream else dataset[dep]
+            for dep in deps
+        ]
+    return calculate(param, dep_attrs, func)
+
+
+def run_calculations(dataset, calculations, calculate, max_workers: int = 1) -> dict:
+    """Run resolved `calculations` on a thread pool, returns their results
+    by param in calculation order.
+
+    `calculate(param, dep_attrs, func)` derives a single param. Each
+    calculation starts as soon as the calculations it depends on are done,
+    independent ones run concurrently. Calculations are submitted in
+    topological order, so the ones waited on have always started."""
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for param, deps, func in calculations:
+            upstream = {dep: futures[dep] for dep in deps if dep in futures}
+            futures[param] = pool.submit(
+                _run_calculation, calculate, dataset, param, deps, func, upstream
+            )
+    return {param: future.result() for param, future in futures.items()}
+
+
+def process_pool(workers=None, initializer=None) -> ProcessPoolExecutor:
+    """Pool of `workers` fresh (spawned) processes, each running
+    `initializer` once before its jobs."""
+    # Forked workers would inherit the threads (e.g. dask's) of this process
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer)
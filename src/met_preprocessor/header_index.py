@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import netCDF4
+import pandas as pd
+from met_preprocessor.discovery import parse_time_range
+from met_preprocessor.utils import write_json_atomic
+
+# Index of the files of a directory, stored in that directory
+INDEX_FILE_NAME = ".met_preprocessor_index.json"
+# Part of the index, to be increased whenever the headers recorded change
+INDEX_VERSION = 1
+TIME_VAR = "time"
+GRID_VARS = ["latitude", "longitude", "lat", "lon"]
+
+
+def _bounds(var):
+    """First and last value of a coordinate, the only values read."""
+    if var.size == 0:
+        return None
+    return [var[0].item(), var[-1].item()]
+
+
+def _coordinate_names(nc) -> set:
+    """Dimension and auxiliary coordinates, which are not data variables."""
+    names = set(nc.dimensions) | set(GRID_VARS)
+    for var in nc.variables.values():
+        names.update(getattr(var, "coordinates", "").split())
+    return names
+
+
+def read_header(file_name: str) -> dict:
+    """Data variables (units and dimensions), time bounds and grid of a
+    NetCDF file, from its metadata and the first/last time and grid
+    coordinates."""
+    stat = os.stat(file_name)
+    with netCDF4.Dataset(file_name) as nc:
+        coordinates = _coordinate_names(nc)
+        header = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "variables": {
+                name: {"units": getattr(var, "units", None), "dims": list(var.dimensions)}
+                for name, var in nc.variables.items()
+                if name not in coordinates
+            },
+            "dims": {name: len(dim) for name, dim in nc.dimensions.items()},
+            "time": None,
+            "grid": {
+                name: _bounds(nc.variables[name]) for name in GRID_VARS if name in nc.variables
+            },
+        }
+        time = nc.variables.get(TIME_VAR)
+        if time is not None and time.size > 0 and hasattr(time, "units"):
+            dates = netCDF4.num2date(
+                _bounds(time),
+                time.units,
+                getattr(time, "calendar", "standard"),
+                only_use_cftime_datetimes=False,
+            )
+            header["time"] = [str(pd.Timestamp(str(date))) for date in dates]
+    return header
+
+
+def index_file_name(directory: str, index_dir: str | None = None) -> str:
+    """Index of `directory`, stored in the directory itself unless an
+    `index_dir` is given (e.g. for read only inputs)."""
+    if index_dir is None:
+        return os.path.join(directory, INDEX_FILE_NAME)
+    key = hashlib.sha256(os.path.abspath(directory).encode()).hexdigest()[:16]
+    return os.path.join(index_dir, f"index_{key}.json")
+
+
+def load_index(file_name: str) -> dict:
+    """Headers by file name, empty if missing or written by another version."""
+    if not os.path.exists(file_name):
+        return {}
+    with open(file_name) as file:
+        content = json.load(file)
+    return content["files"] if content.get("version") == INDEX_VERSION else {}
+
+
+def save_index(file_name: str, headers: dict) -> None:
+    """Indexes which can not be written (e.g. read only inputs) are only
+    kept in memory."""
+    try:
+        write_json_atomic(file_name, {"version": INDEX_VERSION, "files": headers})
+    except OSError as error:
+        print(f"Header index: Could not save {file_name} ({error})")
+
+
+def build_index(file_list: list[str], index_dir: str | None = None) -> dict:
+    """Headers of every file in `file_list` by file name. Headers are
+    reused from the index of each directory while the file's size and
+    modification time are unchanged, the others are read and saved."""
+    by_directory = {}
+    for file_name in file_list:
+        by_directory.setdefault(os.path.dirname(os.path.abspath(file_name)), []).append(file_name)
+
+    headers = {}
+    for directory, files in by_directory.items():
+        index_file = index_file_name(directory, index_dir)
+        index = load_index(index_file)
+        changed = False
+        for file_name in files:
+            name = os.path.basename(file_name)
+            stat = os.stat(file_name)
+            header = index.get(name)
+            if header is None or (header["size"], header["mtime_ns"]) != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                header = index[name] = read_header(file_name)
+                changed = True
+            headers[file_name] = header
+        if changed:
+            save_index(index_file, index)
+    return headers
+
+
+def in_time_range(header: dict, time_range) -> bool:
+    """Whether the time bounds of a file overlap the inclusive `time_range`,
+    files without time always do."""
+    if header["time"] is None or time_range is None:
+        return True
+    start, end = time_range
+    first, last = (pd.Timestamp(date) for date in header["time"])
+    return (end is None or first <= end) and (start is None or last >= start)
+
+
+def prune_inputs(headers: dict, time_range=None, variables=None):
+    """`(files, drop_variables)`: the files having data of `time_range` and
+    any of `variables` (all by default), and the other data variables of
+    those files, which need not be opened."""
+    time_range = parse_time_range(time_range)
+    files, drop_variables = [], set()
+    for file_name, header in headers.items():
+        if not in_time_range(header, time_range):
+            continue
+        names = set(header["variables"])
+        needed = names if variables is None else names & set(variables)
+        if needed:
+            files.append(file_name)
+            drop_variables |= names - needed
+    return files, sorted(drop_variables)
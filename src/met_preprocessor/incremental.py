@@ -0,0 +1,34 @@
+import pandas as pd
+from met_preprocessor.accu import ACCUMULATION_PERIOD
+from met_preprocessor.writer import output_times
+
+
+def output_coverage(file_names) -> dict:
+    """`{file: (time steps, last time)}` of the existing outputs among
+    `file_names`, only counting the fully written steps."""
+    coverage = {}
+    for file_name in file_names:
+        times = output_times(file_name)
+        if times is not None and len(times):
+            coverage[file_name] = (len(times), times[-1])
+    return coverage
+
+
+def update_time_range(time_range, seam):
+    """`time_range` of the inputs needed to extend outputs ending at `seam`:
+    from one accumulation period before it, so that the first new steps
+    are de-accumulated as in a full run."""
+    start, end = time_range or (None, None)
+    load_start = pd.Timestamp(seam) - ACCUMULATION_PERIOD
+    if start is not None and pd.Timestamp(start) > load_start:
+        load_start = pd.Timestamp(start)
+    return [str(load_start), end]
+
+
+def update_groups(file_variables: dict, coverage: dict) -> dict:
+    """Variables of the output files by their `(time steps, last time)`,
+    the files of a group are extended from the same step."""
+    groups = {}
+    for file_name, variables in file_variables.items():
+        groups.setdefault(coverage[file_name], []).extend(variables)
+    return groups
@@ -0,0 +1,159 @@
+import cProfile
+import json
+import pstats
+import resource
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+PROC_IO = "/proc/self/io"
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+MB = 1024**2
+# Number of functions printed from the profile of `profile_stage`
+PROFILE_LINES = 25
+
+# Recorder of the running pipeline, see `recording`
+_recorder = None
+
+
+def io_bytes() -> tuple[int, int]:
+    """Bytes read and written by the process so far, through any file
+    or socket (0 where /proc is not available)."""
+    try:
+        with open(PROC_IO) as file:
+            counters = dict(line.split(": ") for line in file.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except OSError:
+        return 0, 0
+
+
+def peak_rss() -> int:
+    """Peak resident memory (bytes) since the last `reset_peak_rss`."""
+    try:
+        with open(PROC_STATUS) as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss() -> None:
+    """Reset the peak to the current RSS where supported (Linux), otherwise
+    peaks are the process's overall ones."""
+    try:
+        with open(PROC_CLEAR_REFS, "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+class StageRecorder:
+    """Records the wall time, CPU time, peak RSS and bytes read/written of
+    every stage of a run.
+
+    CPU time and I/O are process wide, so stages running concurrently
+    (e.g. calculations) or computing in dask threads share them. In lazy
+    runs, stages only build the graph and the work is recorded while
+    writing. Each finished stage is appended to `output_file` as a JSON
+    line. The `profile_stage` is run under cProfile, its stats saved
+    into `profile_file` (if given) and the slowest functions printed."""
+
+    def __init__(self, output_file=None, profile_stage=None, profile_file=None) -> None:
+        self.output_file = output_file
+        self.profile_stage = profile_stage
+        self.profile_file = profile_file
+        self.records = []
+        self._open = []
+        self._lock = threading.Lock()
+
+    def _update_peaks(self) -> None:
+        peak = peak_rss() / MB
+        for record in self._open:
+            record["peak_rss_mb"] = max(record["peak_rss_mb"], peak)
+
+    @contextmanager
+    def stage(self, name: str):
+        record = {"stage": name, "start": time.time(), "peak_rss_mb": 0.0}
+        with self._lock:
+            # Peaks so far belong to the enclosing stages
+            self._update_peaks()
+            reset_peak_rss()
+            self._open.append(record)
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        read, written = io_bytes()
+        cpu, wall = time.process_time(), time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.process_time() - cpu
+            end_read, end_written = io_bytes()
+            record["read_mb"] = (end_read - read) / MB
+            record["written_mb"] = (end_written - written) / MB
+            with self._lock:
+                self._update_peaks()
+                self._open.remove(record)
+                self.records.append(record)
+                if self.output_file is not None:
+                    with open(self.output_file, "a") as file:
+                        file.write(json.dumps(record) + "\n")
+            if profiler is not None:
+                self._report_profile(profiler)
+
+    def _report_profile(self, profiler: cProfile.Profile) -> None:
+        stats = pstats.Stats(profiler)
+        if self.profile_file is not None:
+            stats.dump_stats(self.profile_file)
+            print(f"Profile of stage '{self.profile_stage}' saved: {self.profile_file}")
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+
+    def summary(self) -> str:
+        """Table of the stages totalled by name (e.g. over time windows),
+        slowest first."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(
+                record["stage"],
+                {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0,
+                 "read_mb": 0.0, "written_mb": 0.0},
+            )
+            total["count"] += 1
+            for key in ["wall_s", "cpu_s", "read_mb", "written_mb"]:
+                total[key] += record[key]
+            total["peak_rss_mb"] = max(total["peak_rss_mb"], record["peak_rss_mb"])
+
+        width = max([len("stage")] + [len(name) for name in totals])
+        lines = [
+            f"{'stage':<{width}} {'count':>5} {'wall s':>9} {'cpu s':>9} "
+            f"{'peak MB':>9} {'read MB':>9} {'write MB':>9}"
+        ]
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]["wall_s"]):
+            lines.append(
+                f"{name:<{width}} {total['count']:>5} {total['wall_s']:>9.3f} "
+                f"{total['cpu_s']:>9.3f} {total['peak_rss_mb']:>9.1f} "
+                f"{total['read_mb']:>9.1f} {total['written_mb']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def recording(recorder: StageRecorder | None):
+    """Make `recorder` record the stages entered from any thread."""
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    try:
+        yield recorder
+    finally:
+        _recorder = previous
+
+
+def stage(name: str):
+    """Stage of the active recorder, a no-op when not recording."""
+    return _recorder.stage(name) if _recorder is not None else nullcontext()
@@ -0,0 +1,184 @@
+import warnings
+import numpy as np
+import xarray as xr
+import metpy.constants as mpconsts
+from metpy.units import units
+from xarray import DataArray
+import met_preprocessor.standard_param as standard_param
+import met_preprocessor.opt_param as opt_param
+from met_preprocessor.unit_conv import REGISTRY_LOCK
+
+# Elements per block, small enough for the block temporaries to stay in cache
+BLOCK_SIZE = 2**14
+
+consts = mpconsts.nounit
+# Fast kernels by the reference calculation function they replace
+FAST_KERNELS = {}
+
+
+def fast_kernel(reference):
+    """Register the decorated function as the fast kernel of `reference`,
+    taking and returning the same DataArrays."""
+
+    def register(kernel):
+        FAST_KERNELS[reference] = kernel
+        return kernel
+
+    return register
+
+
+def unit_factors(da: DataArray, unit: str) -> tuple[float, float]:
+    """`(scale, offset)` converting the values of `da` into `unit`,
+    checking once that the dimensionality matches."""
+    with REGISTRY_LOCK:
+        da_units = units(str(da.metpy.units))
+        if da_units.dimensionality != units(unit).dimensionality:
+            raise Exception(f"{da.name} in {da_units} can not be converted to {unit}")
+        offset = units.Quantity(0.0, da_units).to(unit).m
+        scale = units.Quantity(1.0, da_units).to(unit).m - offset
+    return scale, offset
+
+
+def blockwise(kernel, factors, *arrays) -> np.ndarray:
+    """Evaluate `kernel` over the broadcast `arrays` one block at a time.
+
+    Each block is converted with its `(scale, offset)` factors and
+    computed in float64, so that intermediate arrays are block sized
+    and the output is the only full size allocation."""
+    dtype = np.result_type(*arrays, np.float32)
+    it = np.nditer(
+        [*arrays, None],
+        flags=["external_loop", "buffered", "zerosize_ok"],
+        op_flags=[["readonly"]] * len(arrays) + [["writeonly", "allocate"]],
+        op_dtypes=[np.float64] * len(arrays) + [dtype],
+        casting="same_kind",
+        buffersize=BLOCK_SIZE,
+    )
+    with it:
+        for *blocks, out in it:
+            out[...] = kernel(
+                *(block * scale + offset for block, (scale, offset) in zip(blocks, factors))
+            )
+        return it.operands[-1]
+
+
+def apply_kernel(kernel, args: list[tuple[DataArray, str]], like: DataArray, out_units: str):
+    """Apply a block `kernel` on the (numpy or dask) data of `args`, given
+    as `(DataArray, unit the kernel expects)` pairs."""
+    factors = [unit_factors(da, unit) for da, unit in args]
+    das = [da.metpy.dequantify() for da, _ in args]
+    result = xr.apply_ufunc(
+        lambda *arrays: blockwise(kernel, factors, *arrays),
+        *das,
+        dask="parallelized",
+        output_dtypes=[np.result_type(*das, np.float32)],
+    )
+    result.attrs = dict(like.attrs, units=out_units)
+    return result
+
+
+# Specific humidity, the formulas of the MetPy calls in standard_param._calc_sh
+def _saturation_vapor_pressure(tair, cp, latent_heat_0):
+    """Ambaum (2020) saturation vapour pressure (Pa) over the phase of
+    heat capacity `cp` and latent heat `latent_heat_0` at T0."""
+    heat_power = (cp - consts.Cp_v) / consts.Rv
+    latent_heat = latent_heat_0 - (cp - consts.Cp_v) * (tair - consts.T0)
+    exp_term = (latent_heat_0 / consts.T0 - latent_heat / tair) / consts.Rv
+    return consts.sat_pressure_0c * (consts.T0 / tair) ** heat_power * np.exp(exp_term)
+
+
+def _saturation_vapor_pressure_liquid(tair):
+    return _saturation_vapor_pressure(tair, consts.Cp_l, consts.Lv)
+
+
+def _saturation_vapor_pressure_auto(tair):
+    return np.where(
+        tair > consts.T0,
+        _saturation_vapor_pressure_liquid(tair),
+        _saturation_vapor_pressure(tair, consts.Cp_i, consts.Ls),
+    )
+
+
+def _sh(vp, svp, tair):
+    relative_humidity = vp / svp
+    ## REVIEW: As in _calc_sh, vp is used as the total pressure
+    e_s = _saturation_vapor_pressure_auto(tair)
+    undefined = e_s >= vp
+    if undefined.any():
+        warnings.warn("Saturation mixing ratio is undefined for some vapour pressures")
+    w_s = np.where(undefined, np.nan, consts.epsilon * e_s / (vp - e_s))
+    mixing_ratio = (
+        consts.epsilon * w_s * relative_humidity
+        / (consts.epsilon + w_s * (1 - relative_humidity))
+    )
+    return mixing_ratio / (1 + mixing_ratio)
+
+
+def _vp_vpd_tair_sh(vp, vpd, tair):
+    return _sh(vp, vp + vpd, tair)
+
+
+def _vp_tair_sh(vp, tair):
+    return _sh(vp, _saturation_vapor_pressure_liquid(tair), tair)
+
+
+def _vpd_tair_sh(vpd, tair):
+    svp = _saturation_vapor_pressure_liquid(tair)
+    return _sh(svp - vpd, svp, tair)
+
+
+@fast_kernel(standard_param.vp_vpd_tair_sh)
+def vp_vpd_tair_sh(vp, vpd, tair):
+    return apply_kernel(
+        _vp_vpd_tair_sh, [(vp, "Pa"), (vpd, "Pa"), (tair, "K")], tair, "dimensionless"
+    )
+
+
+@fast_kernel(standard_param.vp_tair_sh)
+def vp_tair_sh(vp, tair):
+    return apply_kernel(_vp_tair_sh, [(vp, "Pa"), (tair, "K")], tair, "dimensionless")
+
+
+@fast_kernel(standard_param.vpd_tair_sh)
+def vpd_tair_sh(vpd, tair):
+    return apply_kernel(_vpd_tair_sh, [(vpd, "Pa"), (tair, "K")], tair, "dimensionless")
+
+
+# Optional params, see opt_param for the references
+PSURF_EXPONENT = consts.g / consts.Rd / 0.0065
+
+
+def _lwdown_swinbank(tair):
+    return 5.31e-14 * tair**6.0
+
+
+def _psurf(tair, elevation):
+    return 1013.25 * (tair / (tair + 0.0065 * elevation)) ** PSURF_EXPONENT
+
+
+def _snow(tair, rain):
+    return np.where(tair < opt_param.T0.m, rain, 0.0)
+
+
+@fast_kernel(opt_param.calc_lwdown_swinbank)
+def calc_lwdown_swinbank(temperature):
+    return apply_kernel(
+        _lwdown_swinbank, [(temperature, "K")], temperature, "watt / meter ** 2"
+    )
+
+
+@fast_kernel(opt_param.calc_psurf)
+def calc_psurf(temperature, elevation):
+    return apply_kernel(
+        _psurf, [(temperature, "K"), (elevation, "m")], temperature, "pascal"
+    )
+
+
+@fast_kernel(opt_param.calc_snow)
+def calc_snow(temperature, rain):
+    # Snowfall in the units of the rain rate, once checked to be one
+    unit_factors(rain, "m s-1")
+    rain_units = str(rain.metpy.units)
+    return apply_kernel(
+        _snow, [(temperature, "K"), (rain, rain_units)], temperature, rain_units
+    )
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+import threading
+import dask
+import dask.threaded
+
+WRITE_STAGE = "write"
+
+
+def _n_tasks(dsk) -> int:
+    # Recent dask versions hand schedulers a graph expression
+    if hasattr(dsk, "__dask_graph__"):
+        dsk = dsk.__dask_graph__()
+    return len(dsk)
+
+
+class ComputeTracker:
+    """Dask scheduler recording which pipeline stage triggered each compute.
+
+    Every stage of a lazy run should only build the task graph, the data
+    is meant to be computed once, while writing the outputs.
+    """
+
+    def __init__(self, scheduler=dask.threaded.get) -> None:
+        self.scheduler = scheduler
+        # Stages run concurrently (e.g. independent calculations) in threads
+        self._local = threading.local()
+        self.computes = []
+
+    @property
+    def current_stage(self):
+        return getattr(self._local, "stage", None)
+
+    def get(self, dsk, keys, **kwargs):
+        self.computes.append((self.current_stage, _n_tasks(dsk)))
+        return self.scheduler(dsk, keys, **kwargs)
+
+    @contextmanager
+    def stage(self, name: str):
+        previous, self._local.stage = self.current_stage, name
+        try:
+            yield
+        finally:
+            self._local.stage = previous
+
+    @contextmanager
+    def activate(self):
+        with dask.config.set(scheduler=self.get):
+            yield self
+
+    def early_computes(self) -> list[tuple[str, int]]:
+        """(stage, number of tasks) of every compute before writing."""
+        return [
+            (stage, n_tasks)
+            for stage, n_tasks in self.computes
+            if stage != WRITE_STAGE
+        ]
+
+    def report(self) -> None:
+        for stage, n_tasks in self.early_computes():
+            print(f"Lazy: stage '{stage}' forced an early compute ({n_tasks} tasks)")
+        n_writes = len(self.computes) - len(self.early_computes())
+        print(f"Lazy: {n_writes} compute(s) while writing outputs")
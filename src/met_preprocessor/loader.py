@@ -0,0 +1,72 @@
+import os
+import re
+import xarray as xr
+from xarray import Dataset
+
+# Trailing date stamps such as `_19500101-19500131` or `_195001`,
+# capturing the first and (optional) last date
+DATE_SUFFIX = re.compile(r"[_-](\d{6,8})(?:-(\d{6,8}))?$")
+
+
+def file_group_key(file_name: str) -> str:
+    """Files which only differ by their trailing date stamp belong
+    to the same variable, e.g. `ssrd_era5-land_oper_sfc_19500101-19500131.nc`
+    maps to `ssrd_era5-land_oper_sfc`."""
+    stem = os.path.basename(file_name).split(".nc")[0]
+    return DATE_SUFFIX.sub("", stem)
+
+
+def group_files_by_variable(file_list: list[str]) -> dict[str, list[str]]:
+    """Groups input files by variable, sorted so that each group
+    can be concatenated along time in filename order."""
+    groups = {}
+    for file_name in file_list:
+        groups.setdefault(file_group_key(file_name), []).append(file_name)
+    return {key: sorted(files) for key, files in sorted(groups.items())}
+
+
+def open_group(files: list[str], chunks=None, parallel: bool = True, drop_variables=None) -> Dataset:
+    """Lazily open all files of a single variable, concatenated along time.
+    Non-time variables/coords are taken from the first file rather than
+    compared across every file. Static fields (e.g. elevation), without a
+    time dimension, are combined by their coordinates instead."""
+    with xr.open_dataset(files[0], drop_variables=drop_variables) as first:
+        static = "time" not in first.dims
+    if static:
+        return xr.open_mfdataset(
+            files,
+            drop_variables=drop_variables,
+            combine="by_coords",
+            chunks=chunks,
+            parallel=parallel,
+        )
+    return xr.open_mfdataset(
+        files,
+        drop_variables=drop_variables,
+        combine="nested",
+        concat_dim="time",
+        chunks=chunks,
+        parallel=parallel,
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        join="override",
+    )
+
+
+def open_input_dataset(
+    file_list: list[str], chunks=None, parallel: bool = True, drop_variables=None
+) -> Dataset:
+    """Open the input files grouped per variable and merge them lazily.
+
+    `chunks` maps dimension names to dask chunk sizes; dimensions
+    absent from the files are ignored, so both `lat` and `latitude`
+    may be listed. Variables in `drop_variables` are not opened."""
+    groups = group_files_by_variable(file_list)
+    datasets = [
+        open_group(files, chunks=chunks, parallel=parallel, drop_variables=drop_variables)
+        for files in groups.values()
+    ]
+    if len(datasets) == 1:
+        return datasets[0]
+    return xr.merge(datasets, compat="override", join="outer", combine_attrs="override")
@@ -1,13 +1,35 @@
+from contextlib import contextmanager, nullcontext
+import os
+import shutil
+import dask
+import pandas as pd
 import yaml
 import xarray as xr
 from met_preprocessor.unit_conv import UnitConversion
-from met_preprocessor.utils import list_nc_files
-from met_preprocessor.accu import daily_to_hourly_acc
-from met_preprocessor.dependency import generate_calculations
+from met_preprocessor.discovery import discover_files
+from met_preprocessor.header_index import build_index, prune_inputs
+from met_preprocessor.loader import open_input_dataset
+from met_preprocessor.accu import daily_to_hourly_acc, ACCUMULATION_PERIOD, DAILY_RESET
+from met_preprocessor.dependency import calculation_levels
+from met_preprocessor.plan import (
+    calculation_plan,
+    load_param_map,
+    prune_calculations,
+    required_params,
+)
+from met_preprocessor.executor import run_calculations
+from met_preprocessor.kernels import FAST_KERNELS
+from met_preprocessor.streaming import time_windows
+from met_preprocessor.writer import write_outputs, open_outputs, output_files, combined_file_name
+from met_preprocessor.checkpoint import open_checkpoint, CHECKPOINT_SUFFIX
+from met_preprocessor.incremental import output_coverage, update_groups, update_time_range
+from met_preprocessor.tiling import spatial_tiles, stitch_tiles, map_tiles
+from met_preprocessor.lazy import ComputeTracker, WRITE_STAGE
+from met_preprocessor.instrument import StageRecorder, recording
+import met_preprocessor.instrument as instrument
 
 xr.set_options(keep_attrs=True)
 
-OUTPUT_FILE_FORMAT = "NETCDF4"
 CONFIG_FILE_NAME = "config.yaml"
 PARAM_MAP_FILE_NAME = "param_map.yaml"
 
@@ -22,6 +44,52 @@ def get_rename_param_criteria(params, param_map):
     return param_criteria
 
 
+def get_output_params(config, param_map):
+    """Requested `outputs`, by default every standard and optional param."""
+    outputs = config.get("outputs")
+    if outputs is None:
+        return [
+            param
+            for param, param_info in param_map.items()
+            if param_info.get("type") in ["standard", "optional"]
+        ]
+    unknown = [param for param in outputs if param not in param_map]
+    if unknown:
+        raise Exception(f"Unknown outputs: {', '.join(unknown)}")
+    return outputs
+
+
+def get_output_plan(variables, config, param_map):
+    """`(outputs, inputs)`: the outputs derivable from the input `variables`
+    and the inputs (named as in the files) they are derived from, walking
+    back through the calculations. Inputs replaced by a calculation or not
+    leading to any output need not be loaded."""
+    param_criteria = get_rename_param_criteria(variables, param_map)
+    params = [param_criteria.get(v, v) for v in variables]
+    calculations = calculation_plan(
+        dict.fromkeys(params), param_map, config.get("plan_cache_dir")
+    )
+    calculated = {param for param, _, _ in calculations}
+    outputs = get_output_params(config, param_map)
+
+    if config.get("outputs") is not None:
+        missing = [p for p in outputs if p not in params and p not in calculated]
+        if missing:
+            raise Exception(f"Outputs can not be derived from the inputs: {', '.join(missing)}")
+
+    outputs = [p for p in outputs if p in params or p in calculated]
+    required = required_params(calculations, outputs) - calculated
+    inputs = [v for v, param in zip(variables, params) if param in required]
+    # Calculations without deps (e.g. constants) still need the grid and time
+    # axis of an input
+    return outputs, inputs or variables[:1]
+
+
+def get_required_inputs(variables, config, param_map):
+    """Inputs the outputs are derived from, see `get_output_plan`."""
+    return get_output_plan(variables, config, param_map)[1]
+
+
 def get_unit_conv_params(param_map):
     """Units conversions are to be done for all params having unit in mapping."""
     return [
@@ -31,103 +99,503 @@ def get_unit_conv_params(param_map):
     ]
 
 
-with open(PARAM_MAP_FILE_NAME) as file:
-    param_map = yaml.safe_load(file)
-
+def get_hourly_acc_params(config):
+    """`hourly_acc` entries are either a param name (reset daily at 00 UTC)
+    or a mapping of param name to the hours its accumulation resets at."""
+    acc_params = {}
+    for entry in config.get("hourly_acc") or []:
+        if isinstance(entry, dict):
+            acc_params.update(entry)
+        else:
+            acc_params[entry] = DAILY_RESET
+    return acc_params
 
-def run_met(dataset=None):
-    """Run preprocessor for meteorological forcing dataset(s)."""
 
-    with open(CONFIG_FILE_NAME) as file:
-        config = yaml.safe_load(file)
+def get_stage_recorder(config):
+    """Recorder of the pipeline stages, if any instrumentation is configured."""
+    if not any(config.get(key) for key in ["instrument", "instrument_file", "profile_stage"]):
+        return None
+    return StageRecorder(
+        config.get("instrument_file"), config.get("profile_stage"), config.get("profile_file")
+    )
 
-    with open(PARAM_MAP_FILE_NAME) as file:
-        param_map = yaml.safe_load(file)
 
-    if dataset is None:
+@contextmanager
+def pipeline_stage(name, tracker=None):
+    """Stage recorded by the active StageRecorder, and by the `tracker`
+    of a lazy run."""
+    with instrument.stage(name), (tracker.stage(name) if tracker else nullcontext()):
+        yield
 
-        ## REVIEW: Have validator like cerberus
-        file_list = []
-        for dir in config.get("directories"):
-            file_list += list_nc_files(dir)
 
-        ## TODO: Have to differentiate output out by variables
-        ## TODO: Look more into parameter options for open_mfdataset
-        print("Loading combined dataset")
-        dataset = xr.open_mfdataset(file_list, compat="override", coords="minimal")
-        print("Loaded combined dataset")
+def process_dataset(dataset, config, param_map, param_conv, tracker=None):
+    """Rename, de-accumulate, convert and derive the output parameters.
+    With a `tracker`, each step runs as a named stage of a lazy run."""
 
-        # NOTE: Ideally remove after appropriate compression, otherwise can put in docs as WIP
-        dataset = dataset.sel(time=slice("1950-01-01 00:00:00", "1950-01-01 23:59:59"))
-        print(dataset)
+    def stage(name):
+        return pipeline_stage(name, tracker)
 
     # 1. Rename parameters
-    param_criteria = get_rename_param_criteria(list(dataset.keys()), param_map)
-    dataset = dataset.rename(param_criteria)
+    with stage("rename"):
+        param_criteria = get_rename_param_criteria(list(dataset.keys()), param_map)
+        dataset = dataset.rename(param_criteria)
 
     # 2. Hourly accumulator
-    for v in config.get("hourly_acc"):
-        dataset[v] = daily_to_hourly_acc(dataset[v])
-    # 3. Unit conversions
-    ## List of all params for unit conversions
-    params = get_unit_conv_params(param_map)
-    param_conv = UnitConversion(params)
+    with stage("hourly_acc"):
+        for v, reset_hours in get_hourly_acc_params(config).items():
+            if v not in dataset:
+                print(f"Hourly accumulation: Skipping {v}")
+                continue
+            dataset[v] = daily_to_hourly_acc(dataset[v], reset_hours)
 
-    for param in params:
+    # 3. Unit conversions
+    for param in param_conv.params:
         if dataset.get(param) is not None:
-            dataset[param] = param_conv.convert_param(
-                dataset[param], param_map[param]["unit"]
-            )
+            with stage(f"convert:{param}"):
+                dataset[param] = param_conv.convert_param(
+                    dataset[param], param_map[param]["unit"]
+                )
         else:
             print(f"Standard Stage: Skipping {param}")
 
     # 4. Doing all possible calculations (Params)
     ## For strict ordering, resulting graph must be DAGs
     ## Can used memoisation + greedy approach
-    dep_list = generate_calculations(dataset, param_map)
+    outputs = get_output_params(config, param_map)
+    dep_list = prune_calculations(
+        calculation_plan(dataset, param_map, config.get("plan_cache_dir")), outputs
+    )
+    for i, level in enumerate(calculation_levels(dep_list)):
+        print(f"Calculation level {i}: {', '.join(param for param, _, _ in level)}")
+
+    fast_kernels = FAST_KERNELS if config.get("fast_kernels") else {}
+
+    def calculate(param, dep_attrs, func):
+        func = fast_kernels.get(func, func)
+        with stage(f"calc:{param}"):
+            # TODO: Try just base unit conversion
+            da = func(*dep_attrs).metpy.dequantify().rename(param)
+            # After convert to actual units needed
+            return param_conv.convert_param(da, param_map[param]["unit"])
+
+    results = run_calculations(
+        dataset, dep_list, calculate, max_workers=config.get("calc_workers", 1)
+    )
+    for param, da in results.items():
+        dataset[param] = da
 
-    for param, deps, func in dep_list:
-        if deps == []:
-            dep_attrs = [dataset.coords, dataset.dims]
+    # Only keep the outputs (not including index variables)
+    return dataset.drop_vars([v for v in dataset.keys() if v not in outputs])
+
+
+def write_dataset(dataset, config, append=False, start=None):
+    """Write the outputs as configured, returns the written file names."""
+    return write_outputs(
+        dataset,
+        config["output_file"],
+        append=append,
+        combined=config.get("combined_output", False),
+        output_encoding=config.get("output_encoding"),
+        output_format=config.get("output_format", "netcdf"),
+        start=start,
+    )
+
+
+def get_output_files(config):
+    """Variables written into each output file of the configured `outputs`."""
+    return output_files(
+        config["output_file"],
+        config["outputs"],
+        config.get("combined_output", False),
+        config.get("output_format", "netcdf"),
+    )
+
+
+def remaining_outputs(config, param_map, dataset, checkpoint, window=None, tile=None):
+    """`(config, dataset)` restricted to the outputs not completed for the
+    `window`/`tile` unit, and the inputs they need. None once all are."""
+    remaining = [
+        var
+        for file_name, variables in get_output_files(config).items()
+        if not checkpoint.is_done(file_name, window, tile)
+        for var in variables
+    ]
+    if not remaining:
+        return None
+    config = dict(config, outputs=remaining)
+    return config, dataset[get_required_inputs(list(dataset.keys()), config, param_map)]
+
+
+def write_window(window, config, checkpoint, window_start):
+    """Write a window of a checkpointed run: new outputs are created, the
+    others appended after their last completed window."""
+    by_start = {}
+    for file_name, variables in get_output_files(config).items():
+        by_start.setdefault(checkpoint.time_steps(file_name), []).extend(variables)
+    for start, variables in by_start.items():
+        file_names = write_dataset(window[variables], config, append=start > 0, start=start)
+        for file_name in file_names:
+            checkpoint.complete(file_name, window_start)
+
+
+def run_met_windows(dataset, config, param_map, param_conv, checkpoint=None):
+    """Process and append the dataset one time window at a time, so that
+    memory is bounded by a single window rather than the full record.
+    With a `checkpoint`, completed windows of each output are skipped."""
+    start, end = config.get("time_range") or (None, None)
+    dataset = dataset.sel(time=slice(None, end))
+    times = dataset.indexes["time"]
+    windows = time_windows(times, config["time_window"], ACCUMULATION_PERIOD, start)
+    for i, (load, keep) in enumerate(windows):
+        window_start = times[load][keep][0]
+        window_config, window_dataset = config, dataset
+        if checkpoint is not None:
+            remaining = remaining_outputs(config, param_map, dataset, checkpoint, window_start)
+            if remaining is None:
+                print(f"Checkpoint: Skipping completed window {window_start}")
+                continue
+            window_config, window_dataset = remaining
+
+        window = process_dataset(window_dataset.isel(time=load), window_config, param_map, param_conv)
+        window = window.isel(time=keep)
+        print(f"Saving window: {window.indexes['time'][0]} - {window.indexes['time'][-1]}")
+        if checkpoint is not None:
+            write_window(window, window_config, checkpoint, window_start)
         else:
-            dep_attrs = list(map(lambda x: dataset[x], deps))
-        # TODO: Try just base unit conversion
-        dataset[param] = func(*dep_attrs)
-        dataset[param] = dataset[param].metpy.dequantify()
-        # After convert to actual units needed
-        dataset[param] = param_conv.convert_param(
-            dataset[param], param_map[param]["unit"]
+            write_dataset(window, config, append=i > 0)
+
+    return open_outputs(list(get_output_files(config)))
+
+
+def run_met_update(dataset, config, param_map, coverage):
+    """Append the time steps of the inputs missing from the existing outputs
+    (with `coverage`, see `incremental.output_coverage`). Each output file
+    is extended from its own last step, in `time_window` windows if given."""
+    file_variables = get_output_files(config)
+    missing = [file_name for file_name in file_variables if file_name not in coverage]
+    if missing:
+        raise Exception(f"Update: {', '.join(missing)} missing, run without update to create them")
+
+    times = dataset.indexes["time"]
+    coverage = {file_name: coverage[file_name] for file_name in file_variables}
+    seam = min(last_time for _, last_time in coverage.values())
+    if times[-1] <= seam:
+        print(f"Update: Outputs are up to date ({seam})")
+        return open_outputs(list(file_variables))
+    if seam not in times:
+        raise Exception(f"Update: Inputs do not cover {seam}, the last time of the outputs")
+    print(f"Update: Appending {seam} - {times[-1]}")
+
+    param_conv = UnitConversion(get_unit_conv_params(param_map))
+    if config.get("time_window") is not None:
+        windows = time_windows(times, config["time_window"], ACCUMULATION_PERIOD)
+    else:
+        windows = [(slice(None), slice(None))]
+    for load, keep in windows:
+        if times[load][keep][-1] <= seam:
+            continue
+        window = process_dataset(dataset.isel(time=load), config, param_map, param_conv)
+        window = window.isel(time=keep)
+        window_times = window.indexes["time"]
+        for (start, last_time), variables in update_groups(file_variables, coverage).items():
+            new = window[variables].isel(time=window_times > last_time)
+            if not new.sizes["time"]:
+                continue
+            print(f"Saving: {new.indexes['time'][0]} - {new.indexes['time'][-1]} from step {start}")
+            for file_name in write_dataset(new, config, append=True, start=start):
+                coverage[file_name] = (start + new.sizes["time"], new.indexes["time"][-1])
+
+    return open_outputs(list(file_variables))
+
+
+def run_met_lazy(dataset, config, param_map, param_conv):
+    """Build the whole pipeline as a dask graph, computed only when
+    writing the outputs. Stages forcing an earlier compute are reported."""
+    if not dataset.chunks:
+        dataset = dataset.chunk(config.get("chunks") or {})
+
+    tracker = ComputeTracker()
+    with tracker.activate():
+        dataset = process_dataset(dataset, config, param_map, param_conv, tracker)
+        dataset = trim_time_range(dataset, config)
+        with tracker.stage(WRITE_STAGE):
+            write_dataset(dataset, config)
+    tracker.report()
+
+    return dataset
+
+
+def find_inputs(config, param_map):
+    """`(file_list, drop_variables)` of the inputs to open."""
+    ## REVIEW: Have validator like cerberus
+    with instrument.stage("discover"):
+        file_list = discover_files(
+            config.get("directories"),
+            time_range=config.get("time_range"),
+            pattern=config.get("file_pattern"),
+            regex=config.get("file_regex"),
+            manifest_file=config.get("manifest_file"),
+            max_workers=config.get("discovery_workers", 8),
         )
+    if not file_list:
+        raise Exception(f"No input files found in {config.get('directories')}")
+    print(f"Discovered {len(file_list)} input files")
 
-    # Only keep standard/optional variables (not including index variables)
-    dataset = dataset.drop_vars(
-        list(
-            filter(
-                lambda x: param_map.get(x, {}).get("type", "")
-                not in ["standard", "optional"],
-                list(dataset.keys()),
+    drop_variables = None
+    if config.get("header_index"):
+        with instrument.stage("index"):
+            headers = build_index(file_list, config.get("index_dir"))
+            in_range, _ = prune_inputs(headers, config.get("time_range"))
+            variables = sorted({v for f in in_range for v in headers[f]["variables"]})
+            file_list, drop_variables = prune_inputs(
+                headers,
+                config.get("time_range"),
+                get_required_inputs(variables, config, param_map),
             )
+        if not file_list:
+            raise Exception(f"No input files of {config.get('time_range')} needed by the outputs")
+        print(f"Header index: Opening {len(file_list)} of {len(headers)} files")
+        if drop_variables:
+            print(f"Header index: Not opening {', '.join(drop_variables)}")
+
+    return file_list, drop_variables
+
+
+def lookback_time_range(time_range):
+    """`time_range` starting one accumulation period earlier, the inputs
+    de-accumulating its first steps depend on."""
+    start, end = time_range
+    if start is None:
+        return time_range
+    return [str(pd.Timestamp(start) - ACCUMULATION_PERIOD), end]
+
+
+def trim_time_range(dataset, config):
+    """Processed dataset without the steps loaded before `time_range`."""
+    if config.get("time_range") is None:
+        return dataset
+    return dataset.sel(time=slice(*config["time_range"]))
+
+
+def load_dataset(config, param_map):
+    """Lazily open the configured inputs over the configured period, and
+    the accumulation period before it (see `trim_time_range`)."""
+    if config.get("time_range") is not None:
+        config = dict(config, time_range=lookback_time_range(config["time_range"]))
+    file_list, drop_variables = find_inputs(config, param_map)
+
+    print("Loading combined dataset")
+    with instrument.stage("open"):
+        dataset = open_input_dataset(
+            file_list,
+            chunks=config.get("chunks"),
+            parallel=config.get("parallel", True),
+            drop_variables=drop_variables,
         )
+    print("Loaded combined dataset")
+
+    if config.get("time_range") is not None:
+        dataset = dataset.sel(time=slice(*config["time_range"]))
+    return dataset
+
+
+def process_and_write(dataset, config, param_map, checkpoint=None):
+    """Process the dataset and write the outputs, in the configured mode.
+    With a `checkpoint`, only the outputs not completed yet are."""
+    ## List of all params for unit conversions
+    param_conv = UnitConversion(get_unit_conv_params(param_map))
+
+    if config.get("time_window") is not None:
+        if config.get("lazy"):
+            # Windows are computed one at a time to bound memory
+            raise Exception("lazy can not be combined with time_window")
+        return run_met_windows(dataset, config, param_map, param_conv, checkpoint)
+
+    all_files = list(get_output_files(config))
+    if checkpoint is not None:
+        remaining = remaining_outputs(config, param_map, dataset, checkpoint)
+        if remaining is None:
+            print("Checkpoint: All outputs completed")
+            return open_outputs(all_files)
+        config, dataset = remaining
+
+    if config.get("lazy"):
+        dataset = run_met_lazy(dataset, config, param_map, param_conv)
+    else:
+        dataset = process_dataset(dataset, config, param_map, param_conv)
+        dataset = trim_time_range(dataset, config)
+
+        print("Saving dataset")
+        print(dataset["time"])
+        write_dataset(dataset, config)
+
+        print("Saved dataset - Check log.txt for warnings")
+
+    if checkpoint is None:
+        return dataset
+    for file_name in get_output_files(config):
+        checkpoint.complete(file_name)
+    return open_outputs(all_files)
+
+
+def run_tile(dataset, config, param_map):
+    """Process and write a single tile in a worker process, computing with
+    `tile_threads` dask threads. Returns the tile's output file."""
+    checkpoint = open_checkpoint(config, param_map)
+    with dask.config.set(scheduler="threads", num_workers=config.get("tile_threads", 1)):
+        result = process_and_write(dataset, config, param_map, checkpoint)
+    result.close()
+    return combined_file_name(config["output_file"])
+
+
+def run_met_tiled(dataset, config, param_map, checkpoint=None):
+    """Run the pipeline on each spatial tile of `tile_size` in worker
+    processes, each writing its own file, then stitch the tiles into the
+    configured outputs. Every step is pointwise in space, so tiles are
+    independent and no process holds the full grid.
+
+    With a `checkpoint`, completed tiles are not run again and each tile
+    checkpoints its own windows, in `{output_file}_tiles/`."""
+    all_files = list(get_output_files(config))
+    if checkpoint is not None and all(checkpoint.is_done(f) for f in all_files):
+        print("Checkpoint: All outputs completed")
+        return open_outputs(all_files)
+
+    tiles = spatial_tiles(dataset.sizes, config["tile_size"])
+    tile_dir = f"{config['output_file']}_tiles"
+    os.makedirs(tile_dir, exist_ok=True)
+    tile_files, jobs = [], []
+    for i, tile in enumerate(tiles):
+        tile_file = os.path.join(tile_dir, f"tile_{i}")
+        tile_files.append(combined_file_name(tile_file))
+        if checkpoint is not None and checkpoint.is_done(tile_files[i], tile=i):
+            print(f"Checkpoint: Skipping completed tile {i}")
+            continue
+        tile_config = dict(
+            config,
+            output_file=tile_file,
+            checkpoint_file=f"{tile_file}{CHECKPOINT_SUFFIX}",
+            combined_output=True,
+            output_format="netcdf",
+            tile_size=None,
+            instrument=False,
+            instrument_file=None,
+            profile_stage=None,
+        )
+        jobs.append((i, (dataset.isel(tile), tile_config, param_map)))
+
+    def tile_done(job, tile_file):
+        if checkpoint is not None:
+            checkpoint.complete(tile_file, tile=jobs[job][0])
+
+    tile_datasets, stitched = [], False
+    try:
+        print(f"Processing {len(jobs)} of {len(tiles)} tiles")
+        with instrument.stage("tiles"):
+            map_tiles(
+                run_tile,
+                [job for _, job in jobs],
+                workers=config.get("tile_workers"),
+                scheduler=config.get("tile_scheduler", "processes"),
+                cluster=config.get("tile_cluster"),
+                done=tile_done,
+            )
+
+        print("Stitching tiles")
+        chunks = {"time": (config.get("chunks") or {}).get("time", 24)}
+        for file_name in tile_files:
+            tile_datasets.append(xr.open_dataset(file_name, chunks=chunks))
+        with instrument.stage("stitch"):
+            file_names = write_dataset(stitch_tiles(tile_datasets, tiles), config)
+        stitched = True
+    finally:
+        for tile_dataset in tile_datasets:
+            tile_dataset.close()
+        # Tiles of a failed run are only reused by resuming its checkpoint
+        if not stitched and checkpoint is None:
+            shutil.rmtree(tile_dir, ignore_errors=True)
+
+    if checkpoint is not None:
+        for file_name in file_names:
+            checkpoint.complete(file_name)
+        checkpoint.discard(tile_files)
+    shutil.rmtree(tile_dir)
+
+    return open_outputs(file_names)
+
+
+def get_update_coverage(config, param_map):
+    """Coverage of the existing outputs to update, None to process the
+    full record (not updating, or no outputs yet)."""
+    if not config.get("update"):
+        return None
+    if config.get("tile_size") or config.get("checkpoint") or config.get("resume"):
+        raise Exception("update can not be combined with tile_size or checkpoint/resume")
+    candidates = output_files(
+        config["output_file"],
+        get_output_params(config, param_map),
+        config.get("combined_output", False),
+        config.get("output_format", "netcdf"),
     )
+    coverage = output_coverage(candidates)
+    if not coverage:
+        print("Update: No existing outputs, processing the full record")
+        return None
+    return coverage
+
+
+def run_pipeline(dataset, config, param_map):
+    """Load (unless a `dataset` is given), process and write the outputs.
+    With `update`, only the inputs after the existing outputs are."""
+    coverage = get_update_coverage(config, param_map)
+    if coverage is not None:
+        seam = min(last_time for _, last_time in coverage.values())
+        config = dict(config, time_range=update_time_range(config.get("time_range"), seam))
+    if dataset is None:
+        dataset = load_dataset(config, param_map)
+    elif coverage is not None:
+        dataset = dataset.sel(time=slice(*lookback_time_range(config["time_range"])))
 
-    print("Saving dataset")
+    # Only the inputs of the outputs are renamed, accumulated and converted
+    outputs, required = get_output_plan(list(dataset.keys()), config, param_map)
+    config = dict(config, outputs=outputs)
+    unused = [v for v in dataset.keys() if v not in required]
+    if unused:
+        print(f"Not loading inputs unused by the outputs: {', '.join(unused)}")
+        dataset = dataset[required]
+    print(dataset)
 
-    # Combine filtered params
-    compression_dict = {"zlib": True, "complevel": 5, "shuffle": True}
+    if coverage is not None:
+        return run_met_update(dataset, config, param_map, coverage)
 
-    print("Saving dataset")
-    print(dataset["time"])
-    for var in dataset.data_vars:
-        print(f"Saving var: {var}")
-        dataset[var].encoding.update(compression_dict)
-        dataset[var].to_netcdf(f"{config['output_file']}_{var}.nc", format="NETCDF4")
+    checkpoint = open_checkpoint(config, param_map)
+    if config.get("tile_size"):
+        return run_met_tiled(dataset, config, param_map, checkpoint)
 
-    print("Saved dataset - Check log.txt for warnings")
+    return process_and_write(dataset, config, param_map, checkpoint)
+
+
+def run_config(config, param_map, dataset=None):
+    """Run the pipeline of a config, recording its stages if configured."""
+    recorder = get_stage_recorder(config)
+    with recording(recorder):
+        dataset = run_pipeline(dataset, config, param_map)
+    if recorder is not None:
+        print(recorder.summary())
 
     return dataset
 
 
+def run_met(dataset=None):
+    """Run preprocessor for meteorological forcing dataset(s)."""
+
+    with open(CONFIG_FILE_NAME) as file:
+        config = yaml.safe_load(file)
+
+    param_map = load_param_map(PARAM_MAP_FILE_NAME)
+
+    return run_config(config, param_map, dataset)
+
+
 if __name__ == "__main__":
     run_met()
-
-# https://github.com/AusClimateService/axiom
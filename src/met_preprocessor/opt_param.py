@@ -2,6 +2,8 @@ from metpy.units import units, check_units
 from metpy.xarray import preprocess_and_wrap
 import metpy.constants as c
 import xarray as xr
+from collections.abc import Mapping
+from met_preprocessor.constant import constant_field
 
 
 # REVIEW: Metpy has recently added triple point as well (c.T0)
@@ -48,6 +50,11 @@ def default_co2(coords, dims):
     commit: b8596c6143cce23d5d312a2070403fc949814e1d
     location: src/offline#cable.nml#L32
     """
+    # Kept as a single value broadcast over the dataset, see constant.py
+    sizes = dims if isinstance(dims, Mapping) else {dim: len(coords[dim]) for dim in dims}
     return xr.DataArray(
-        350 / 1000000, coords=coords, dims=dims, attrs={"units": "ppm"}
+        constant_field(350.0, tuple(sizes.values())),
+        coords=coords,
+        dims=list(sizes),
+        attrs={"units": "ppm"},
     )
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+import yaml
+from met_preprocessor.dependency import generate_calculations, calculation_func
+from met_preprocessor.utils import write_json_atomic
+
+PLAN_FILE_PREFIX = "plan_"
+# Part of the plan key, to be increased whenever the resolution of plans
+# changes so that plans persisted by earlier versions are not reused
+PLAN_VERSION = 2
+# Resolved calculations by plan key, shared by every run of the process
+PLAN_CACHE = {}
+# Parsed param maps by (file name, modification time)
+PARAM_MAP_CACHE = {}
+PLAN_LOCK = threading.Lock()
+
+
+def load_param_map(file_name: str) -> dict:
+    """Parsed param map, only re-read once the file has changed.
+    The returned mapping is shared and must not be modified."""
+    key = (os.path.abspath(file_name), os.stat(file_name).st_mtime_ns)
+    if key not in PARAM_MAP_CACHE:
+        with open(file_name) as file:
+            PARAM_MAP_CACHE[key] = yaml.safe_load(file)
+    return PARAM_MAP_CACHE[key]
+
+
+def plan_key(param_map: dict, input_vars) -> str:
+    """Hash of the param map and the set of input variables, the only
+    things the resolved calculations depend on."""
+    content = json.dumps(
+        [PLAN_VERSION, param_map, sorted(set(map(str, input_vars)))],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def plan_file_name(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{PLAN_FILE_PREFIX}{key}.json")
+
+
+def save_plan(file_name: str, calculations) -> None:
+    """Store calculations as `[param, deps, func name]` entries."""
+    write_json_atomic(file_name, [[param, deps, func.__name__] for param, deps, func in calculations])
+
+
+def load_plan(file_name: str, param_map: dict):
+    with open(file_name) as file:
+        entries = json.load(file)
+    return [
+        (param, deps, calculation_func(param_map[param], func_name))
+        for param, deps, func_name in entries
+    ]
+
+
+def calculation_plan(dataset, param_map: dict, cache_dir: str | None = None):
+    """Resolved calculations for the variables of `dataset` (or any mapping
+    keyed by variable names), see `generate_calculations`. Plans are
+    memoized in memory and, with a `cache_dir`, persisted across processes."""
+    key = plan_key(param_map, dataset.keys())
+    with PLAN_LOCK:
+        if key in PLAN_CACHE:
+            return PLAN_CACHE[key]
+
+        file_name = plan_file_name(cache_dir, key) if cache_dir is not None else None
+        if file_name is not None and os.path.exists(file_name):
+            print(f"Loading calculation plan: {file_name}")
+            calculations = load_plan(file_name, param_map)
+        else:
+            calculations = generate_calculations(dataset, param_map)
+            if file_name is not None:
+                save_plan(file_name, calculations)
+
+        PLAN_CACHE[key] = calculations
+        return calculations
+
+
+def required_params(calculations, outputs) -> set:
+    """The `outputs` and every param they are derived from, walking back
+    through resolved (topologically ordered) `calculations`."""
+    required = set(outputs)
+    for param, deps, _ in reversed(calculations):
+        if param in required:
+            required.update(deps)
+    return required
+
+
+def prune_calculations(calculations, outputs):
+    """Only the calculations the `outputs` are derived from."""
+    required = required_params(calculations, outputs)
+    return [calculation for calculation in calculations if calculation[0] in required]
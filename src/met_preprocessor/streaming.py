@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+def time_windows(times, window: str, overlap: pd.Timedelta, start=None):
+    """Split a sorted time axis into windows of pandas frequency `window`
+    (e.g. `1MS` for calendar months), from `start` if given. `times` can
+    also be a `CFTimeIndex` of a non-standard calendar.
+
+    Yields `(load, keep)` index slices: `load` additionally covers
+    `overlap` before the window so that stateful steps (e.g. hourly
+    de-accumulation) see the values they depend on, `keep` selects the
+    window itself out of the loaded block.
+    """
+    positions = xr.DataArray(np.arange(len(times)), coords={"time": times}, dims="time")
+    times = positions.indexes["time"]
+    if start is not None:
+        positions = positions.sel(time=slice(start, None))
+    for _, window_positions in positions.resample(time=window):
+        if not window_positions.size:
+            continue
+        first, last = int(window_positions[0]), int(window_positions[-1])
+        load_start = int(times.searchsorted(times[first] - overlap, side="left"))
+        yield slice(load_start, last + 1), slice(first - load_start, None)
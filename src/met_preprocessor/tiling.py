@@ -0,0 +1,78 @@
+import itertools
+from concurrent.futures import as_completed
+import xarray as xr
+from met_preprocessor.executor import process_pool
+
+
+def spatial_tiles(sizes, tile_size: dict) -> list[dict]:
+    """`isel` indexers of the tiles covering the grid, e.g. `tile_size`
+    `{latitude: 600, longitude: 1200}`. Dimensions absent from `sizes`
+    are ignored. Tiles are ordered row-major over the dims of `tile_size`."""
+    dims = [dim for dim in tile_size if dim in sizes]
+    starts = [range(0, sizes[dim], tile_size[dim]) for dim in dims]
+    return [
+        {
+            dim: slice(start, min(start + tile_size[dim], sizes[dim]))
+            for dim, start in zip(dims, tile_starts)
+        }
+        for tile_starts in itertools.product(*starts)
+    ]
+
+
+def _nest(items: list, shape: list[int]) -> list:
+    if len(shape) <= 1:
+        return items
+    step = len(items) // shape[0]
+    return [_nest(items[i * step : (i + 1) * step], shape[1:]) for i in range(shape[0])]
+
+
+def stitch_tiles(datasets: list, tiles: list[dict]):
+    """Combine the datasets of `tiles` (in `spatial_tiles` order) into the
+    full grid, lazily."""
+    dims = list(tiles[0])
+    if not dims:
+        return datasets[0]
+    shape = [len({tile[dim].start for tile in tiles}) for dim in dims]
+    return xr.combine_nested(
+        _nest(datasets, shape),
+        concat_dim=dims,
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        combine_attrs="override",
+    )
+
+
+def map_tiles(
+    func, jobs: list[tuple], workers=None, scheduler: str = "processes", cluster=None, done=None
+) -> list:
+    """`func(*job)` of every job, in order. `done(i, result)` is called as
+    soon as job `i` finishes.
+
+    With the `processes` scheduler, jobs run in a pool of `workers` fresh
+    (spawned) processes. With `distributed`, they run on the dask cluster
+    at `cluster` (e.g. spanning several nodes), or on a local cluster of
+    `workers` processes."""
+    if scheduler == "distributed":
+        try:
+            from distributed import Client, as_completed as distributed_completed
+        except ImportError:
+            raise Exception("tile_scheduler distributed requires the distributed package")
+        client = Client(cluster) if cluster else Client(n_workers=workers, threads_per_worker=1)
+        with client:
+            futures = [client.submit(func, *job, pure=False) for job in jobs]
+            return _gather(futures, distributed_completed(futures), done)
+    if scheduler != "processes":
+        raise Exception(f"Unknown tile_scheduler: {scheduler}")
+
+    with process_pool(workers) as pool:
+        futures = [pool.submit(func, *job) for job in jobs]
+        return _gather(futures, as_completed(futures), done)
+
+
+def _gather(futures: list, completed, done) -> list:
+    index = {future: i for i, future in enumerate(futures)}
+    for future in completed:
+        if done is not None:
+            done(index[future], future.result())
+    return [future.result() for future in futures]
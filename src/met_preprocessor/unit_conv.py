@@ -1,43 +1,81 @@
+import os
+import threading
+from contextlib import nullcontext
+from typing import NamedTuple
+import numpy as np
 import pint
-from pint import Unit
+import xarray as xr
 from xarray import DataArray
 from metpy.units import units
+from met_preprocessor.constant import constant_field, constant_value, is_constant_field
 
+UNIT_DEFINITIONS_FILE = os.path.join(os.path.dirname(__file__), "units.txt")
 
-def rain_conversion(units: Unit, depth_time: Unit):
-    """Conversion from precipitation in terms of depth
-    (<length> / <time>) to intensity (kg / m^2 / s^-1)"""
-    return (1000 * units.water) * (1 * depth_time).to_base_units()
+# Values a cached conversion plan must convert exactly like pint does
+PROBE_VALUES = np.array([0.0, 1.0, 2.0, -40.0, 273.15, 101325.0, 1e-7, 3.3333])
 
+# Guards every use of the registry which mutates it (loading definitions,
+# enabling contexts). Cached plans are applied without it.
+REGISTRY_LOCK = threading.RLock()
+_registry_ready = False
+# Names of the contexts loaded by `setup_registry`
+CONTEXTS = set()
+
+# Shared by all UnitConversion instances of the process
+CONVERSION_PLANS = {}
+
+
+def setup_registry(definitions_file: str = UNIT_DEFINITIONS_FILE) -> pint.UnitRegistry:
+    """Load the additional definitions and contexts into the registry,
+    once per process. Afterwards the registry is only read from."""
+    global _registry_ready
+    with REGISTRY_LOCK:
+        if not _registry_ready:
+            units.load_definitions(definitions_file)
+            CONTEXTS.update(context_names(definitions_file))
+            _registry_ready = True
+    return units
+
+
+def context_names(definitions_file: str) -> list[str]:
+    """Names of the contexts of a definitions file, declared as
+    `@context <name>` or `@context(<params>) <name>`."""
+    with open(definitions_file) as file:
+        return [line.split()[1] for line in file if line.strip().startswith("@context")]
+
+
+def unit_context(name: str):
+    """Context named after the param, if one is defined for it."""
+    if name in CONTEXTS:
+        return units.context(name)
+    return nullcontext()
 
-class UnitConversion:
-    def __init__(self, params: list[str]) -> None:
-        self.contexts = {}
-        self._add_unit_conversions(params)
 
-    def _add_unit_conversions(self, params: list[str]) -> None:
-        """Define additional unit conversions other than default ones
-        in `metpy`/`pint`."""
-        # TODO: Load from file
-        units.define("Celsius = degC")
-        units.define("HPa = 100 Pa")
+class ConversionPlan(NamedTuple):
+    """Conversion as `new = old * scale + offset`. `scale` is None for
+    conversions which are not affine and have to go through pint."""
 
-        # REVIEW: Concurrency issue on ctx if parallized
-        for param in params:
-            self._add_new_empty_context(param)
+    scale: float | None
+    offset: float
+    units: str
 
-        if "Rainf" in self.contexts:
-            self.contexts["Rainf"].add_transformation(
-                "[length] / [time]",
-                "[mass] / [length] ** 2 / [time]",
-                rain_conversion,
-            )
 
-        self._add_new_empty_context("month")
+def _affine(data, scale: float, offset: float):
+    if is_constant_field(data):
+        # Only convert the single value of constant fields
+        return constant_field(constant_value(data) * scale + offset, data.shape)
+    # Single output allocation, the offset is added in place
+    out = np.multiply(data, scale)
+    if offset:
+        out += offset
+    return out
 
-    def _add_new_empty_context(self, param: str) -> None:
-        self.contexts[param] = pint.Context(param)
-        units.add_context(self.contexts[param])
+
+class UnitConversion:
+    def __init__(self, params: list[str]) -> None:
+        self.params = params
+        self.plans = CONVERSION_PLANS
+        setup_registry()
 
     @staticmethod
     def _convert_units(da: DataArray, new_unit: str) -> DataArray:
@@ -49,29 +87,61 @@ class UnitConversion:
         return da
 
     @staticmethod
-    def _apply_month_conv_group(da: DataArray, month_ctx, daily_units):
-        assert da.size != 0
-        n_days = da.time[0].dt.days_in_month
-        month_ctx.redefine(f"month = {n_days} * days")
-        with units.context("month"):
-            return UnitConversion._convert_units(da, str(daily_units))
+    def _build_plan(old_unit: str, new_unit: str) -> ConversionPlan:
+        """Derive scale and offset from converting a few probe values with
+        pint, the plan is only used if it reproduces all of them exactly."""
+        probe = DataArray(PROBE_VALUES, dims="probe", attrs={"units": old_unit})
+        expected = UnitConversion._convert_units(probe, new_unit)
+        offset = float(expected[0])
+        plan = ConversionPlan(float(expected[1]) - offset, offset, expected.attrs["units"])
+        if not np.array_equal(_affine(PROBE_VALUES, plan.scale, plan.offset), expected.values):
+            return plan._replace(scale=None)
+        return plan
+
+    def _conversion_plan(self, old_unit: str, new_unit: str, context: str) -> ConversionPlan:
+        key = (old_unit, new_unit, context)
+        if key not in self.plans:
+            with REGISTRY_LOCK, unit_context(context):
+                self.plans[key] = self._build_plan(old_unit, new_unit)
+        return self.plans[key]
+
+    def _convert(self, da: DataArray, new_unit: str, context: str) -> DataArray:
+        """Convert with a cached plan, applied directly on the raw (numpy
+        or dask) data instead of wrapping it into pint quantities."""
+        if new_unit == da.units:
+            return da
+        plan = self._conversion_plan(da.units, new_unit, context)
+        if plan.scale is None:
+            with REGISTRY_LOCK, unit_context(context):
+                return self._convert_units(da, new_unit)
+        da = xr.apply_ufunc(
+            _affine,
+            da,
+            kwargs={"scale": plan.scale, "offset": plan.offset},
+            dask="parallelized",
+            output_dtypes=[np.result_type(da.dtype, plan.scale)],
+            keep_attrs=True,
+        )
+        da.attrs["units"] = plan.units
+        return da
 
     def _monthly_conversions(self, da: DataArray) -> DataArray:
-        """Convert monthly to daily data."""
+        """Convert monthly to daily data, using the length of each step's
+        own month (in the time coordinate's calendar, cftime included)."""
         print(f"Monthly conversions for {da.name}")
         monthly_units = pint.util.to_units_container(units(da.units))
         daily_units = monthly_units.rename("month", "day")
-        gb = da.groupby("time.days_in_month")
-        da_days = gb.map(
-            self._apply_month_conv_group,
-            (self.contexts["month"], daily_units),
-        )
+        days_in_month = da["time"].dt.days_in_month.astype(float)
+        # X month**n = X * days_in_month**n day**n
+        da_days = da * days_in_month ** monthly_units["month"]
+        da_days.attrs = dict(da.attrs, units=str(daily_units))
+        da_days.name = da.name
         return da_days
 
     def convert_param(self, da: DataArray, out_units: str) -> DataArray:
         """Convert parameter into necessary units."""
-        print(f"Converting param: {da.name}")
-        with units.context(da.name):
-            if "month" in str(da.units):
-                da = self._monthly_conversions(da)
-            return self._convert_units(da, out_units)
+        context = da.name
+        print(f"Converting param: {context}")
+        if "month" in str(da.units):
+            da = self._monthly_conversions(da)
+        return self._convert(da, out_units, context)
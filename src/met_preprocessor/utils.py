@@ -1,3 +1,4 @@
+import json
 import os
 
 
@@ -9,6 +10,16 @@ def list_nc_files(d):
     files = []
     for r, d, f in os.walk(d):
         for file in f:
-            if ".nc" in file:
+            if file.endswith(".nc"):
                 files.append(os.path.join(r, file))
     return files
+
+
+def write_json_atomic(file_name, content):
+    """Write `content` as JSON into a temporary file renamed over
+    `file_name`, so that concurrent jobs never read a partial file."""
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    temp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, "w") as file:
+        json.dump(content, file)
+    os.replace(temp_file_name, file_name)
@@ -0,0 +1,246 @@
+import os
+import dask
+import dask.array
+import netCDF4
+import numpy as np
+import pandas as pd
+import xarray as xr
+from xarray import DataArray, Dataset
+from met_preprocessor.constant import is_constant_field, constant_value
+import met_preprocessor.instrument as instrument
+
+OUTPUT_FILE_FORMAT = "NETCDF4"
+COMPRESSION = {"zlib": True, "complevel": 5, "shuffle": True}
+# File extension per `output_format`
+OUTPUT_EXTENSIONS = {"netcdf": ".nc", "zarr": ".zarr"}
+# Global attribute of new outputs until their data is written, their time
+# axis is written (with all steps) before the data is computed
+INCOMPLETE_ATTR = "met_preprocessor_incomplete"
+
+
+def variable_encoding(da: DataArray, output_encoding: dict) -> dict:
+    """NetCDF encoding of an output variable: the `default` entry of
+    `output_encoding` updated with the variable's own entry.
+
+    `chunksizes` may map dimension names to on-disk chunk sizes, missing
+    dimensions are stored in one chunk."""
+    encoding = dict(output_encoding.get("default", COMPRESSION))
+    encoding.update(output_encoding.get(da.name) or {})
+    chunksizes = encoding.get("chunksizes")
+    if isinstance(chunksizes, dict):
+        encoding["chunksizes"] = tuple(
+            min(chunksizes.get(dim, size), size) for dim, size in da.sizes.items()
+        )
+    return encoding
+
+
+def output_file_name(output_file: str, var: str, output_format: str = "netcdf") -> str:
+    return f"{output_file}_{var}{OUTPUT_EXTENSIONS[output_format]}"
+
+
+def combined_file_name(output_file: str, output_format: str = "netcdf") -> str:
+    return f"{output_file}{OUTPUT_EXTENSIONS[output_format]}"
+
+
+def output_files(output_file: str, outputs, combined: bool = False, output_format: str = "netcdf") -> dict:
+    """Variables written into each output file, see `write_outputs`."""
+    if combined:
+        return {combined_file_name(output_file, output_format): list(outputs)}
+    return {output_file_name(output_file, var, output_format): [var] for var in outputs}
+
+
+def chunk_constant_fields(ds: Dataset) -> Dataset:
+    """Split constant fields (see `constant.py`) into single time step
+    chunks, so that writers only expand one step of the value at a time."""
+    constants = {}
+    for var in ds.data_vars:
+        da = ds[var]
+        if "time" in da.dims and is_constant_field(da.data):
+            # Built from the value, chunking the view would copy it
+            constants[var] = da.copy(
+                data=dask.array.broadcast_to(
+                    constant_value(da.data),
+                    da.shape,
+                    chunks=tuple(1 if dim == "time" else size for dim, size in da.sizes.items()),
+                )
+            )
+    return ds.assign(constants) if constants else ds
+
+
+def _append_netcdf(ds: Dataset, file_name: str, start: int | None = None) -> None:
+    """Append `ds` along the (unlimited) time dimension of an existing file,
+    from time step `start` (by default its end) so that steps left over by
+    an interrupted append are overwritten. Times are written once all the
+    data is, see `output_times`."""
+    with netCDF4.Dataset(file_name, "a") as nc:
+        time_var = nc.variables["time"]
+        if start is None:
+            start = len(time_var)
+        n_times = ds.sizes["time"]
+        for var in ds.data_vars:
+            nc_var = nc.variables[var]
+            da = ds[var].transpose(*nc_var.dimensions)
+            # Constant fields are written one time step at a time
+            step = 1 if is_constant_field(da.data) else n_times
+            for i in range(0, n_times, step):
+                region = tuple(
+                    slice(start + i, start + i + step) if dim == "time" else slice(None)
+                    for dim in nc_var.dimensions
+                )
+                nc_var[region] = da.isel(time=slice(i, i + step)).values
+        # Times last, steps of an interrupted append are left without time
+        times = ds.indexes["time"]
+        if isinstance(times, pd.DatetimeIndex):
+            times = times.to_pydatetime()
+        time_var[start : start + n_times] = netCDF4.date2num(
+            list(times),
+            time_var.units,
+            getattr(time_var, "calendar", "standard"),
+        )
+
+
+def write_zarr(ds: Dataset, store: str, append: bool = False, output_encoding=None, start=None):
+    """Write `ds` into a Zarr store, or append to it along time.
+
+    Variables are rechunked to their configured `chunksizes` so that each
+    dask chunk maps onto whole Zarr chunks, which dask workers then write
+    in parallel. Compression settings only apply to NetCDF outputs.
+    Appends always extend the store, `start` must be its end."""
+    if append:
+        if start is not None:
+            n_times = xr.open_zarr(store).sizes["time"]
+            if start != n_times:
+                raise Exception(f"{store} has {n_times} time steps, can not append at {start}")
+        return ds.to_zarr(store, append_dim="time", compute=False)
+
+    ds = chunk_constant_fields(ds.copy())
+    for var in ds.data_vars:
+        # Encodings of the inputs (e.g. NetCDF chunking) do not apply
+        ds[var].encoding = {}
+        chunksizes = variable_encoding(ds[var], output_encoding or {}).get("chunksizes")
+        if chunksizes is not None:
+            ds[var] = ds[var].chunk(dict(zip(ds[var].dims, chunksizes)))
+    return ds.assign_attrs({INCOMPLETE_ATTR: 1}).to_zarr(store, mode="w", compute=False)
+
+
+def write_file(ds: Dataset, file_name: str, append: bool = False, output_encoding=None, start=None):
+    """Write `ds` into a single file. Time is kept unlimited, so that
+    later calls with `append` can extend the file along time (from time
+    step `start` if given).
+
+    New files are only set up here (marked incomplete, see
+    `mark_complete`), the returned delayed object writes the data once
+    computed."""
+    if append:
+        _append_netcdf(ds, file_name, start)
+        return None
+
+    return chunk_constant_fields(ds).assign_attrs({INCOMPLETE_ATTR: 1}).to_netcdf(
+        file_name,
+        format=OUTPUT_FILE_FORMAT,
+        unlimited_dims=["time"],
+        encoding={
+            var: variable_encoding(ds[var], output_encoding or {})
+            for var in ds.data_vars
+        },
+        compute=False,
+    )
+
+
+def mark_complete(file_name: str) -> None:
+    """Remove the incomplete mark of a new output once its data is written."""
+    if file_name.endswith(OUTPUT_EXTENSIONS["zarr"]):
+        import zarr
+
+        del zarr.open_group(file_name, mode="r+").attrs[INCOMPLETE_ATTR]
+        zarr.consolidate_metadata(file_name)
+    else:
+        with netCDF4.Dataset(file_name, "a") as nc:
+            nc.delncattr(INCOMPLETE_ATTR)
+
+
+def write_outputs(
+    dataset: Dataset,
+    output_file: str,
+    append: bool = False,
+    combined: bool = False,
+    output_encoding=None,
+    output_format: str = "netcdf",
+    start: int | None = None,
+) -> list[str]:
+    """Write every data variable into its own `{output_file}_{var}.nc`,
+    or all of them into `{output_file}.nc` if `combined`. See
+    `variable_encoding` for the per variable `output_encoding`.
+    With `output_format="zarr"`, `.zarr` stores are written instead.
+    Appends start at time step `start` of the files if given.
+
+    All files are written from a single evaluation of the shared graph,
+    so common upstream inputs (e.g. Tair for Qair and LWDown) are only
+    computed once."""
+    if append:
+        # Appends write numpy data, compute the window in one go instead
+        with instrument.stage("compute"):
+            dataset = dataset.compute()
+
+    outputs = {
+        file_name: dataset[variables]
+        for file_name, variables in output_files(
+            output_file, list(dataset.data_vars), combined, output_format
+        ).items()
+    }
+
+    write = write_zarr if output_format == "zarr" else write_file
+    writes = []
+    for file_name, ds in outputs.items():
+        print(f"Saving: {file_name}")
+        # Appends are written here, new files only set up
+        with instrument.stage(f"write:{os.path.basename(file_name)}"):
+            writes.append(write(ds, file_name, append, output_encoding, start))
+    with instrument.stage("write"):
+        dask.compute(*[write for write in writes if write is not None])
+    if not append:
+        for file_name in outputs:
+            mark_complete(file_name)
+
+    return list(outputs)
+
+
+def output_times(file_name: str):
+    """Time axis of the steps fully written into an output, None if it can
+    not be read or its creation was interrupted (see `INCOMPLETE_ATTR`).
+    Steps of an interrupted NetCDF append have no time yet (see
+    `_append_netcdf`), the ones after the first of them are ignored."""
+    try:
+        if file_name.endswith(OUTPUT_EXTENSIONS["zarr"]):
+            with xr.open_dataset(file_name, engine="zarr") as ds:
+                return None if INCOMPLETE_ATTR in ds.attrs else ds.indexes["time"]
+        with netCDF4.Dataset(file_name) as nc:
+            if INCOMPLETE_ATTR in nc.ncattrs():
+                return None
+            time_var = nc.variables["time"]
+            values = time_var[:]
+            missing = np.ma.getmaskarray(values)
+            n_times = int(missing.argmax()) if missing.any() else len(values)
+            dates = netCDF4.num2date(
+                np.ma.getdata(values)[:n_times],
+                time_var.units,
+                getattr(time_var, "calendar", "standard"),
+                only_use_cftime_datetimes=False,
+            )
+            return pd.DatetimeIndex([pd.Timestamp(str(date)) for date in dates])
+    except Exception:
+        return None
+
+
+def open_outputs(file_names: list[str]) -> Dataset:
+    """Lazily open written outputs as a single dataset."""
+    datasets = []
+    for file_name in file_names:
+        engine = "zarr" if file_name.endswith(OUTPUT_EXTENSIONS["zarr"]) else None
+        datasets.append(xr.open_dataset(file_name, engine=engine, chunks={}))
+    return xr.merge(
+        datasets,
+        compat="override",
+        join="outer",
+        combine_attrs="override",
+    )
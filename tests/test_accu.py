@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 
-from met_preprocessor.accu import daily_to_hourly_acc
+from met_preprocessor.accu import accumulation_resets, daily_to_hourly_acc
 
 
 class TestDailyToHourlyAcc:
@@ -40,4 +40,71 @@ class TestDailyToHourlyAcc:
         result = daily_to_hourly_acc(single_day_data)
         expected_attrs = {"long_name": "RainFall", "units" : "mm hr**-1"}
 
-        assert result.attrs == expected_attrs
\ No newline at end of file
+        assert result.attrs == expected_attrs
+
+class TestMultiDayAcc:
+    """Test cases for de-accumulating across accumulation resets."""
+
+    @pytest.fixture
+    def multi_day_data(self):
+        """Three days of hourly rainfall accumulated since midnight."""
+        time = pd.date_range("2024-01-01", periods=72, freq="h")
+        hourly = np.tile(np.arange(1, 25), 3)
+        data = xr.DataArray(
+            np.tile(np.arange(1, 25).cumsum(), 3),
+            coords={"time": time},
+            dims=["time"],
+            name="Rainf",
+            attrs={"units": "mm"},
+        )
+        return data, hourly
+
+    def test_daily_to_hourly_acc_multi_day(self, multi_day_data):
+        """Test every day is de-accumulated independently and in order."""
+        data, hourly = multi_day_data
+
+        result = daily_to_hourly_acc(data)
+
+        assert (result.values == hourly).all()
+        assert result.indexes["time"].equals(data.indexes["time"])
+
+    def test_daily_to_hourly_acc_dask(self, multi_day_data):
+        """Test chunks not aligned to days give identical results."""
+        data, hourly = multi_day_data
+
+        result = daily_to_hourly_acc(data.chunk(time=10))
+
+        assert result.chunks is not None
+        assert (result.values == hourly).all()
+
+    def test_daily_to_hourly_acc_reset_hours(self):
+        """Test accumulations resetting at 06/18 UTC."""
+        time = pd.date_range("2024-01-01", periods=24, freq="h")
+        hours = time.hour.values
+        data = xr.DataArray(
+            ((hours - 6) % 12 + 1).astype(float),
+            coords={"time": time},
+            dims=["time"],
+            attrs={"units": "mm"},
+        )
+
+        result = daily_to_hourly_acc(data, reset_hours=[6, 18])
+
+        assert (result.values[1:] == 1).all()
+
+    @pytest.mark.parametrize(
+        "reset_hours,expected",
+        [
+            ([0], [0, 24]),
+            ([6, 18], [0, 6, 18, 30]),
+        ],
+    )
+    def test_accumulation_resets(self, reset_hours, expected):
+        """Test reset positions for daily and 12-hourly accumulations."""
+        time = xr.DataArray(
+            pd.date_range("2024-01-01", periods=36, freq="h"), dims="time"
+        )
+
+        result = accumulation_resets(time, reset_hours)
+
+        assert list(np.flatnonzero(result)) == expected
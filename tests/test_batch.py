@@ -0,0 +1,183 @@
+import json
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import dask
+import pytest
+import yaml
+import met_preprocessor.batch as batch
+from met_preprocessor.batch import batch_summary, config_jobs, run_batch, run_job, site_jobs
+
+
+@pytest.fixture
+def site_manifest(tmp_path):
+    """Manifest of two sites sharing a base config."""
+    base = tmp_path / "base.yaml"
+    base.write_text(yaml.safe_dump({"hourly_acc": ["Rainf"], "output_file": "/out/{name}/met"}))
+    manifest = tmp_path / "sites.yaml"
+    manifest.write_text(
+        yaml.safe_dump(
+            {
+                "config": str(base),
+                "defaults": {"directories": ["/data/{name}"]},
+                "sites": [{"name": "AU-Tum"}, {"name": "US-Ha1", "time_range": ["2000", "2001"]}],
+            }
+        )
+    )
+    return str(manifest)
+
+
+@pytest.fixture
+def missing_input_config(tmp_path):
+    """Config of a site without any input file."""
+    return {"directories": [str(tmp_path / "missing")], "output_file": str(tmp_path / "out" / "met")}
+
+
+class CrashingPool:
+    """In-process stand-in of a process pool, broken (as by a crashed
+    worker) from its job named `crash` on."""
+
+    def __init__(self, workers=None, initializer=None):
+        self.broken = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, func, name, *args):
+        future = Future()
+        self.broken = self.broken or name == "crash"
+        if self.broken:
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        else:
+            future.set_result(func(name, *args))
+        return future
+
+
+class TestJobs:
+    """Test cases for config_jobs and site_jobs functions."""
+
+    def test_config_jobs(self, tmp_path):
+        """Test config files are named after the file."""
+        config_file = tmp_path / "AU-Tum.yaml"
+        config_file.write_text(yaml.safe_dump({"output_file": "out"}))
+
+        assert config_jobs([str(config_file)]) == [("AU-Tum", {"output_file": "out"})]
+
+    def test_site_jobs(self, site_manifest):
+        """Test sites update the defaults, with their name replacing `{name}`."""
+        result = site_jobs(site_manifest)
+
+        assert result == [
+            (
+                "AU-Tum",
+                {"hourly_acc": ["Rainf"], "output_file": "/out/AU-Tum/met", "directories": ["/data/AU-Tum"]},
+            ),
+            (
+                "US-Ha1",
+                {
+                    "hourly_acc": ["Rainf"],
+                    "output_file": "/out/US-Ha1/met",
+                    "directories": ["/data/US-Ha1"],
+                    "time_range": ["2000", "2001"],
+                },
+            ),
+        ]
+
+
+class TestRunBatch:
+    """Test cases for run_job and run_batch functions."""
+
+    def test_run_job_failure(self, missing_input_config, param_map):
+        """Test failures are reported rather than raised."""
+        report = run_job("AU-Tum", missing_input_config, param_map)
+
+        assert report["status"] == "failed"
+        assert report["error"].startswith("Exception: No input files found")
+        assert report["wall_s"] >= 0
+
+    def test_run_batch_isolates_failures(self, tmp_path, param_map, monkeypatch):
+        """Test jobs after a failing one still run, reports are in job order."""
+        ran = []
+
+        def run_config(config, param_map):
+            if config["output_file"] == "bad":
+                raise Exception("No input files found")
+            ran.append(config["output_file"])
+
+        monkeypatch.setattr(batch, "run_config", run_config)
+        report_file = tmp_path / "batch.jsonl"
+        jobs = [("bad", {"output_file": "bad"}), ("good", {"output_file": str(tmp_path / "good")})]
+
+        reports = run_batch(jobs, param_map, report_file=str(report_file))
+
+        assert [(report["name"], report["status"]) for report in reports] == [("bad", "failed"), ("good", "ok")]
+        assert ran == [str(tmp_path / "good")]
+        assert [json.loads(line)["name"] for line in report_file.read_text().splitlines()] == ["bad", "good"]
+
+    def test_run_batch_workers(self, tmp_path, missing_input_config, param_map):
+        """Test jobs fanned out to worker processes are reported in job order."""
+        jobs = [(name, missing_input_config) for name in ["a", "b", "c"]]
+
+        reports = run_batch(jobs, param_map, workers=2)
+
+        assert [report["name"] for report in reports] == ["a", "b", "c"]
+        assert all(report["status"] == "failed" for report in reports)
+
+    def test_run_batch_worker_crash(self, param_map, monkeypatch):
+        """Test the unfinished jobs of a crashed pool run again, only the
+        job crashing on its own is reported as failed."""
+        ran = []
+
+        def run_config(config, param_map):
+            ran.append(config["output_file"])
+
+        monkeypatch.setattr(batch, "run_config", run_config)
+        monkeypatch.setattr(batch, "process_pool", CrashingPool)
+        jobs = [(name, {"output_file": name}) for name in ["a", "crash", "b", "c", "d"]]
+
+        reports = run_batch(jobs, param_map, workers=2)
+
+        assert [(report["name"], report["status"]) for report in reports] == [
+            ("a", "ok"),
+            ("crash", "failed"),
+            ("b", "ok"),
+            ("c", "ok"),
+            ("d", "ok"),
+        ]
+        assert reports[1]["error"].startswith("BrokenProcessPool")
+        assert sorted(ran) == ["a", "b", "c", "d"]
+
+    @pytest.mark.parametrize("workers, threads, expected", [(1, None, None), (1, 4, 4), (2, None, 1)])
+    def test_run_batch_threads(self, param_map, monkeypatch, workers, threads, expected):
+        """Test jobs of workers compute with one dask thread unless given."""
+        num_workers = []
+
+        def run_config(config, param_map):
+            num_workers.append(dask.config.get("num_workers", None))
+
+        monkeypatch.setattr(batch, "run_config", run_config)
+        monkeypatch.setattr(batch, "process_pool", CrashingPool)
+
+        run_batch([("a", {})], param_map, workers=workers, threads=threads)
+
+        assert num_workers == [expected]
+
+
+class TestBatchSummary:
+    """Test cases for batch_summary function."""
+
+    def test_batch_summary(self):
+        """Test jobs are listed slowest first with the totals."""
+        reports = [
+            {"name": "a", "status": "ok", "wall_s": 1.0, "cpu_s": 0.5},
+            {"name": "b", "status": "failed", "wall_s": None, "cpu_s": None, "error": "BrokenProcessPool: crashed"},
+            {"name": "c", "status": "ok", "wall_s": 2.0, "cpu_s": 1.5},
+        ]
+
+        lines = batch_summary(reports).splitlines()
+
+        assert [line.split()[0] for line in lines[1:4]] == ["c", "a", "b"]
+        assert lines[3].endswith("BrokenProcessPool: crashed")
+        assert lines[-1] == "3 jobs, 1 failed, 3.000 s of job time"
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from met_preprocessor.checkpoint import (
+    Checkpoint,
+    checkpoint_file_name,
+    config_key,
+    open_checkpoint,
+)
+from met_preprocessor.writer import write_outputs
+
+
+@pytest.fixture
+def output_dataset():
+    """Two days of hourly Tair on a 2x2 grid."""
+    time = pd.date_range("2024-01-01", periods=48, freq="h")
+    return xr.Dataset(
+        {"Tair": (("time", "lat", "lon"), np.random.rand(48, 2, 2), {"units": "kelvin"})},
+        coords={"lat": [1.0, 2.0], "lon": [3.0, 4.0], "time": time},
+    )
+
+
+@pytest.fixture
+def checkpointed_day(tmp_path, output_dataset):
+    """Fixture writing the first day and checkpointing it, returns
+    (checkpoint file, output file)."""
+    [output] = write_outputs(output_dataset.isel(time=slice(0, 24)), str(tmp_path / "out"))
+    checkpoint = Checkpoint(str(tmp_path / "out.checkpoint.json"), "key")
+    checkpoint.complete(output, "2024-01-01")
+    return checkpoint.file_name, output
+
+
+class TestConfigKey:
+    """Test cases for config_key function."""
+
+    def test_config_key_resumable_entries(self, param_map):
+        """Test entries not affecting the outputs do not change the key."""
+        config = {"output_file": "a", "time_window": "1D"}
+        key = config_key(config, param_map)
+
+        assert config_key(dict(config, output_file="b", calc_workers=8, resume=True), param_map) == key
+        assert config_key(dict(config, time_window="1MS"), param_map) != key
+
+
+class TestCheckpoint:
+    """Test cases for the Checkpoint manifest."""
+
+    def test_checkpoint_units(self, checkpointed_day):
+        """Test completed units and time steps are recorded and resumed."""
+        file_name, output = checkpointed_day
+
+        checkpoint = Checkpoint(file_name, "key", resume=True)
+
+        assert checkpoint.is_done(output, "2024-01-01")
+        assert not checkpoint.is_done(output, "2024-01-02")
+        assert checkpoint.time_steps(output) == 24
+
+    def test_checkpoint_without_resume(self, checkpointed_day):
+        """Test runs without resume start over."""
+        file_name, output = checkpointed_day
+
+        assert not Checkpoint(file_name, "key").is_done(output, "2024-01-01")
+
+    def test_checkpoint_other_config(self, checkpointed_day):
+        """Test checkpoints of another configuration are not resumed."""
+        file_name, _ = checkpointed_day
+
+        with pytest.raises(Exception, match="of another configuration"):
+            Checkpoint(file_name, "other", resume=True)
+
+    def test_checkpoint_verify_removed(self, checkpointed_day):
+        """Test units of removed outputs are redone."""
+        file_name, output = checkpointed_day
+        os.remove(output)
+
+        checkpoint = Checkpoint(file_name, "key", resume=True)
+
+        assert checkpoint.units == {}
+
+    def test_checkpoint_verify_rewritten(self, checkpointed_day, output_dataset):
+        """Test outputs rewritten with other times are removed and redone."""
+        file_name, output = checkpointed_day
+        output_dataset.isel(time=slice(24, None)).to_netcdf(output)
+
+        checkpoint = Checkpoint(file_name, "key", resume=True)
+
+        assert checkpoint.units == {}
+        assert not os.path.exists(output)
+
+    def test_checkpoint_discard(self, checkpointed_day):
+        """Test units of discarded outputs are forgotten."""
+        file_name, output = checkpointed_day
+        checkpoint = Checkpoint(file_name, "key", resume=True)
+
+        checkpoint.discard([output])
+
+        assert not Checkpoint(file_name, "key", resume=True).is_done(output, "2024-01-01")
+
+
+class TestOpenCheckpoint:
+    """Test cases for open_checkpoint function."""
+
+    def test_open_checkpoint_disabled(self, param_map):
+        """Test runs are only checkpointed when configured."""
+        assert open_checkpoint({"output_file": "out"}, param_map) is None
+
+    def test_open_checkpoint_file_name(self, tmp_path, param_map):
+        """Test the manifest is kept next to the outputs by default."""
+        config = {"output_file": str(tmp_path / "out"), "checkpoint": True}
+
+        checkpoint = open_checkpoint(config, param_map)
+
+        assert checkpoint.file_name == checkpoint_file_name(config) == f"{tmp_path}/out.checkpoint.json"
@@ -2,11 +2,17 @@ import pytest
 from met_preprocessor.met_preprocessing import (
     get_rename_param_criteria,
     get_unit_conv_params,
+    get_hourly_acc_params,
+    get_output_params,
+    get_required_inputs,
 )
 from met_preprocessor.dependency import (
     process_dependencies,
     order_load_dep,
     cycle_check,
+    find_cycle,
+    resolve_calculations,
+    calculation_levels,
 )
 from met_preprocessor.opt_param import calc_lwdown_swinbank
 from met_preprocessor.standard_param import vpd_tair_sh
@@ -128,6 +134,69 @@ class TestGetUnitConvParams:
         assert result == ["Tair"]
 
 
+class TestGetHourlyAccParams:
+    """Test cases for get_hourly_acc_params function."""
+
+    def test_get_hourly_acc_params_daily(self):
+        """Test plain names default to a daily reset."""
+        config = {"hourly_acc": ["SWDown", "Rainf"]}
+
+        result = get_hourly_acc_params(config)
+
+        assert result == {"SWDown": (0,), "Rainf": (0,)}
+
+    def test_get_hourly_acc_params_reset_hours(self):
+        """Test mappings declare their own reset hours."""
+        config = {"hourly_acc": ["SWDown", {"Snowf": [7, 19]}]}
+
+        result = get_hourly_acc_params(config)
+
+        assert result == {"SWDown": (0,), "Snowf": [7, 19]}
+
+    def test_get_hourly_acc_params_missing(self):
+        """Test configs without hourly_acc."""
+        assert get_hourly_acc_params({}) == {}
+
+
+class TestGetOutputParams:
+    """Test cases for get_output_params function."""
+
+    def test_get_output_params_default(self, param_map):
+        """Test every standard and optional param is an output by default."""
+        result = get_output_params({}, param_map)
+
+        assert result == [
+            "Tair", "SWDown", "Qair", "Rainf", "LWDown", "PSurf", "Snowf", "CO2air", "patchfrac"
+        ]
+
+    def test_get_output_params_unknown(self, param_map):
+        """Test requesting a param missing from the param map."""
+        with pytest.raises(Exception, match="Unknown outputs: Foo"):
+            get_output_params({"outputs": ["Tair", "Foo"]}, param_map)
+
+
+class TestGetRequiredInputs:
+    """Test cases for get_required_inputs function."""
+
+    def test_get_required_inputs_outputs(self, param_map):
+        """Test only the inputs of the requested outputs are required."""
+        variables = ["tavg", "vpd", "srad", "rain", "extra"]
+
+        assert get_required_inputs(variables, {"outputs": ["Qair"]}, param_map) == ["tavg", "vpd"]
+        assert get_required_inputs(variables, {"outputs": ["LWDown"]}, param_map) == ["tavg"]
+
+    def test_get_required_inputs_default(self, param_map):
+        """Test inputs of no output are not required by default."""
+        variables = ["tavg", "vpd", "srad", "rain", "extra"]
+
+        assert get_required_inputs(variables, {}, param_map) == ["tavg", "vpd", "srad", "rain"]
+
+    def test_get_required_inputs_underivable(self, param_map):
+        """Test requested outputs must be derivable from the inputs."""
+        with pytest.raises(Exception, match="can not be derived from the inputs: Qair"):
+            get_required_inputs(["tavg"], {"outputs": ["Qair"]}, param_map)
+
+
 class TestProcessDependencies:
     """Test cases for process_dependencies function."""
 
@@ -207,6 +276,116 @@ class TestCycleCheck:
         assert result is True
 
 
+def test_process_dependencies_without_deps():
+    """Test recipes without deps (constants) are always calculable."""
+    param_map = {"CO2air": {"type": "optional", "calc": [{"func": "default_co2"}]}}
+
+    dependencies = process_dependencies(param_map)
+
+    assert dependencies["CO2air"][0][0] == []
+    assert [p for p, _, _ in resolve_calculations(dependencies, [])] == ["CO2air"]
+
+
+class TestFindCycle:
+    """Test cases for the single pass find_cycle function."""
+
+    def test_find_cycle_no_cycle(self):
+        """Test a DAG with shared dependencies has no cycle."""
+        adj_list = {"A": ["B", "C"], "B": ["C"], "C": []}
+
+        assert find_cycle(adj_list) is None
+
+    @pytest.mark.parametrize(
+        "adj_list",
+        [
+            {"A": ["A"]},
+            {"A": ["B"], "B": ["A"]},
+            {"D": [], "A": ["B"], "B": ["C"], "C": ["A"]},
+        ],
+    )
+    def test_find_cycle(self, adj_list):
+        """Test self loops and longer cycles are found."""
+        assert find_cycle(adj_list) in adj_list
+
+    def test_find_cycle_long_chain(self):
+        """Test deep graphs do not hit the recursion limit."""
+        adj_list = {f"p{i}": [f"p{i + 1}"] for i in range(10000)}
+
+        assert find_cycle(adj_list) is None
+
+
+class TestResolveCalculations:
+    """Test cases for the worklist based resolve_calculations function."""
+
+    def test_resolve_calculations_docstring_example(self):
+        """Test chained params are ordered after their dependencies."""
+        dependencies = {2: [([1, 4], "f2a"), ([1, 3], "f2b")], 4: [([1], "f4")]}
+
+        result = resolve_calculations(dependencies, [1, 3])
+
+        assert result == [(4, [1], "f4"), (2, [1, 4], "f2a")]
+
+    def test_resolve_calculations_priority(self, param_map):
+        """Test the highest priority satisfiable recipe is chosen."""
+        dependencies = process_dependencies(param_map)
+
+        result = resolve_calculations(dependencies, ["vp", "vpd", "Tair"])
+
+        assert ("Qair", ["vp", "vpd", "Tair"]) in [(p, d) for p, d, _ in result]
+
+    def test_resolve_calculations_unsatisfiable(self):
+        """Test params missing dependencies are skipped."""
+        dependencies = {"A": [(["x", "y"], "fa")], "B": [(["A"], "fb")]}
+
+        assert resolve_calculations(dependencies, ["x"]) == []
+
+    def test_resolve_calculations_scales(self):
+        """Test a long chain of derived params resolves in order."""
+        n = 5000
+        dependencies = {
+            f"p{i}": [([f"p{i + 1}"], "f"), (["input"], "g")] for i in range(n)
+        }
+
+        result = resolve_calculations(dependencies, ["input"])
+
+        assert [param for param, _, _ in result] == [f"p{i}" for i in reversed(range(n))]
+        assert result[0][1] == ["input"]
+
+
+class TestCalculationLevels:
+    """Test cases for calculation_levels function."""
+
+    def test_calculation_levels_independent(self):
+        """Test calculations only depending on inputs share the first level."""
+        calculations = [("A", ["x"], "fa"), ("B", ["y"], "fb")]
+
+        assert calculation_levels(calculations) == [calculations]
+
+    def test_calculation_levels_chain(self):
+        """Test dependants are placed one level after their dependencies."""
+        calculations = resolve_calculations(
+            {
+                "A": [(["x"], "fa")],
+                "B": [(["A", "x"], "fb")],
+                "C": [(["y"], "fc")],
+                "D": [(["B", "C"], "fd")],
+            },
+            ["x", "y"],
+        )
+
+        result = calculation_levels(calculations)
+
+        assert [[param for param, _, _ in level] for level in result] == [
+            ["A", "C"],
+            ["B"],
+            ["D"],
+        ]
+
+    def test_calculation_levels_empty(self):
+        """Test no calculations give no levels."""
+        assert calculation_levels([]) == []
+
+
 class TestOrderLoadDep:
     """Test cases for order_load_dep function."""
 
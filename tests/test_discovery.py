@@ -0,0 +1,161 @@
+import json
+import os
+import pandas as pd
+import pytest
+import met_preprocessor.discovery as discovery
+from met_preprocessor.discovery import (
+    Manifest,
+    discover_files,
+    file_time_range,
+    keep_file,
+)
+
+
+@pytest.fixture
+def era5_tree(tmp_path):
+    """ERA5 like tree `{var}/{year}/{var}_..._{month}.nc` with stray files."""
+    root = tmp_path / "era5"
+    files = []
+    for var in ["2t", "tp"]:
+        for year in [1950, 1951]:
+            directory = root / var / str(year)
+            directory.mkdir(parents=True)
+            for month in [1, 2]:
+                start = pd.Timestamp(year=year, month=month, day=1)
+                end = start + pd.offsets.MonthEnd()
+                file_name = directory / f"{var}_era5-land_oper_sfc_{start:%Y%m%d}-{end:%Y%m%d}.nc"
+                file_name.touch()
+                files.append(str(file_name))
+            (directory / "partial.nc.tmp").touch()
+            (directory / "index.ncml").touch()
+    return root, sorted(files)
+
+
+@pytest.fixture
+def old_directories(monkeypatch):
+    """Fixture keeping the listings of just created directories."""
+    monkeypatch.setattr(discovery, "MTIME_MARGIN_NS", -(10**12))
+
+
+class TestFileTimeRange:
+    """Test cases for file_time_range function."""
+
+    def test_file_time_range_days(self):
+        """Test a day range covers the whole last day."""
+        result = file_time_range("/a/2t_era5-land_oper_sfc_19500101-19500131.nc")
+
+        assert result == (pd.Timestamp("1950-01-01"), pd.Timestamp("1950-02-01"))
+
+    def test_file_time_range_month(self):
+        """Test a single month stamp covers the month."""
+        result = file_time_range("/a/tp_195002.nc")
+
+        assert result == (pd.Timestamp("1950-02-01"), pd.Timestamp("1950-03-01"))
+
+    @pytest.mark.parametrize("file_name", ["/a/test_input.nc", "/a/run_1234567.nc", "/a/x_19501399.nc"])
+    def test_file_time_range_unknown(self, file_name):
+        """Test files without a valid date stamp have no range."""
+        assert file_time_range(file_name) is None
+
+
+class TestKeepFile:
+    """Test cases for keep_file function."""
+
+    def test_keep_file_time_range(self):
+        """Test files are kept when overlapping the inclusive time range."""
+        time_range = (pd.Timestamp("1950-01-31 23:00"), pd.Timestamp("1950-02-01"))
+
+        assert keep_file("/a/t_19500101-19500131.nc", time_range)
+        assert keep_file("/a/t_19500201-19500228.nc", time_range)
+        assert not keep_file("/a/t_19500301-19500331.nc", time_range)
+        assert keep_file("/a/t.nc", time_range)
+
+    def test_keep_file_patterns(self):
+        """Test the glob applies to the file name and the regex to the path."""
+        assert keep_file("/a/2t/t_1950.nc", pattern="t_*.nc")
+        assert not keep_file("/a/2t/t_1950.nc", pattern="2t*")
+        assert keep_file("/a/2t/t_1950.nc", regex="/2t/")
+        assert not keep_file("/a/2t/t_1950.nc", regex="/tp/")
+
+
+class TestDiscoverFiles:
+    """Test cases for discover_files function."""
+
+    def test_discover_files_recursive(self, era5_tree):
+        """Test every `.nc` file is found, and only those."""
+        root, files = era5_tree
+
+        assert discover_files([str(root)], max_workers=4) == files
+
+    def test_discover_files_single_file(self, era5_tree):
+        """Test files given directly are used as they are."""
+        _, files = era5_tree
+
+        assert discover_files(files[:1]) == files[:1]
+
+    def test_discover_files_time_range(self, era5_tree, monkeypatch):
+        """Test only files of the time range are kept and directories of
+        other years are not listed."""
+        root, files = era5_tree
+        listed = []
+        listing = Manifest.listing
+        monkeypatch.setattr(
+            Manifest, "listing", lambda self, d: listed.append(d) or listing(self, d)
+        )
+
+        result = discover_files([str(root)], time_range=["1950-01-15", "1950-01-31 23:00"])
+
+        assert result == [f for f in files if "19500101-19500131" in f]
+        assert not any(d.endswith("1951") for d in listed)
+
+    def test_discover_files_pattern(self, era5_tree):
+        """Test the glob and regex filters."""
+        root, files = era5_tree
+
+        assert discover_files([str(root)], pattern="tp_*") == [f for f in files if "/tp_" in f]
+        assert discover_files([str(root)], regex="/2t/1951/") == [
+            f for f in files if "/2t/1951/" in f
+        ]
+
+    def test_discover_files_missing_directory(self, tmp_path):
+        """Test missing directories are skipped."""
+        assert discover_files([str(tmp_path / "missing")]) == []
+
+
+class TestManifest:
+    """Test cases for the directory listing manifest."""
+
+    def test_manifest_reused(self, era5_tree, old_directories, monkeypatch):
+        """Test unchanged directories are not listed again by a later run."""
+        root, files = era5_tree
+        manifest_file = str(root.parent / "manifest.json")
+        discover_files([str(root)], manifest_file=manifest_file)
+
+        def fail(*args):
+            raise AssertionError("directory listed again")
+
+        monkeypatch.setattr(os, "scandir", fail)
+        assert discover_files([str(root)], manifest_file=manifest_file) == files
+
+    def test_manifest_invalidated(self, era5_tree, old_directories):
+        """Test a directory is listed again once its content changed."""
+        root, files = era5_tree
+        manifest_file = str(root.parent / "manifest.json")
+        discover_files([str(root)], manifest_file=manifest_file)
+
+        new_file = root / "tp" / "1951" / "tp_era5-land_oper_sfc_19510301-19510331.nc"
+        new_file.touch()
+        directory = str(new_file.parent)
+        os.utime(directory, ns=(0, os.stat(directory).st_mtime_ns + 10**9))
+
+        assert discover_files([str(root)], manifest_file=manifest_file) == sorted(
+            files + [str(new_file)]
+        )
+
+    def test_manifest_skips_recent_directories(self, era5_tree):
+        """Test listings of just modified directories are not persisted."""
+        root, _ = era5_tree
+        manifest_file = root.parent / "manifest.json"
+        discover_files([str(root)], manifest_file=str(manifest_file))
+
+        assert not manifest_file.exists() or json.loads(manifest_file.read_text())["directories"] == {}
@@ -0,0 +1,73 @@
+import os
+import threading
+import pytest
+import xarray as xr
+from met_preprocessor.executor import process_pool, run_calculations
+
+
+@pytest.fixture()
+def dataset():
+    """Fixture providing a dataset with two inputs."""
+    return xr.Dataset({"x": ("time", [1.0, 2.0]), "y": ("time", [3.0, 4.0])})
+
+
+def add(*das):
+    return sum(das)
+
+
+def calculate(param, dep_attrs, func):
+    return func(*dep_attrs).rename(param)
+
+
+class TestRunCalculations:
+    """Test cases for run_calculations function."""
+
+    def test_run_calculations_chain(self, dataset):
+        """Test dependants use the results of earlier calculations."""
+        calculations = [("A", ["x", "y"], add), ("B", ["A", "x"], add)]
+
+        result = run_calculations(dataset, calculations, calculate, max_workers=2)
+
+        assert list(result) == ["A", "B"]
+        assert result["B"].values.tolist() == [5.0, 8.0]
+
+    def test_run_calculations_recalculated_input(self, dataset):
+        """Test a recalculated input is used by its dependants."""
+        calculations = [("x", ["y"], add), ("A", ["x", "y"], add)]
+
+        result = run_calculations(dataset, calculations, calculate, max_workers=2)
+
+        assert result["A"].values.tolist() == [6.0, 8.0]
+
+    def test_run_calculations_concurrent(self, dataset):
+        """Test independent calculations run at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(da):
+            barrier.wait()
+            return da
+
+        calculations = [("A", ["x"], wait), ("B", ["y"], wait)]
+
+        result = run_calculations(dataset, calculations, calculate, max_workers=2)
+
+        assert result["A"].equals(dataset["x"].rename("A"))
+
+    def test_run_calculations_error(self, dataset):
+        """Test errors of a calculation are raised."""
+
+        def fail(da):
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError, match="failed"):
+            run_calculations(dataset, [("A", ["x"], fail)], calculate)
+
+
+class TestProcessPool:
+    """Test cases for process_pool function."""
+
+    def test_process_pool(self):
+        """Test jobs run in spawned worker processes."""
+        with process_pool(2) as pool:
+            assert pool.submit(pow, 2, 3).result() == 8
+            assert pool.submit(os.getpid).result() != os.getpid()
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+import met_preprocessor.header_index as header_index
+from met_preprocessor.header_index import (
+    INDEX_FILE_NAME,
+    build_index,
+    index_file_name,
+    prune_inputs,
+    read_header,
+)
+
+
+@pytest.fixture
+def input_files(tmp_path):
+    """Two days of t2m (with an extra variable) and one day of an unknown variable."""
+    files = []
+    for var, day in [("t2m", "2000-01-01"), ("t2m", "2000-01-02"), ("junk", "2000-01-01")]:
+        time = pd.date_range(day, periods=24, freq="h")
+        ds = xr.Dataset(
+            {var: (("time", "latitude", "longitude"), np.ones((24, 2, 3), "float32"), {"units": "K"})},
+            coords={"time": time, "latitude": [10.0, 20.0], "longitude": [0.0, 1.0, 2.0]},
+        )
+        if var == "t2m":
+            ds["extra"] = ds[var] * 2
+        file_name = tmp_path / f"{var}_sfc_{time[0]:%Y%m%d}-{time[-1]:%Y%m%d}.nc"
+        ds.to_netcdf(file_name)
+        files.append(str(file_name))
+    return files
+
+
+class TestReadHeader:
+    """Test cases for read_header function."""
+
+    def test_read_header(self, input_files):
+        """Test variables, time bounds and grid are recorded."""
+        header = read_header(input_files[0])
+
+        assert header["variables"] == {
+            "t2m": {"units": "K", "dims": ["time", "latitude", "longitude"]},
+            "extra": {"units": "K", "dims": ["time", "latitude", "longitude"]},
+        }
+        assert header["time"] == ["2000-01-01 00:00:00", "2000-01-01 23:00:00"]
+        assert header["dims"] == {"time": 24, "latitude": 2, "longitude": 3}
+        assert header["grid"] == {"latitude": [10.0, 20.0], "longitude": [0.0, 2.0]}
+
+
+class TestBuildIndex:
+    """Test cases for build_index function."""
+
+    def test_build_index_persisted(self, input_files, tmp_path, monkeypatch):
+        """Test headers are saved next to the inputs and reused."""
+        headers = build_index(input_files)
+        assert os.path.exists(tmp_path / INDEX_FILE_NAME)
+
+        def fail(file_name):
+            raise AssertionError(f"{file_name} read again")
+
+        monkeypatch.setattr(header_index, "read_header", fail)
+        assert build_index(input_files) == headers
+
+    def test_build_index_changed_file(self, input_files, monkeypatch):
+        """Test only files changed since indexed are read again."""
+        build_index(input_files)
+        stat = os.stat(input_files[0])
+        os.utime(input_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        read = []
+        monkeypatch.setattr(
+            header_index, "read_header", lambda f, read_header=read_header: read.append(f) or read_header(f)
+        )
+
+        build_index(input_files)
+
+        assert read == [input_files[0]]
+
+    def test_build_index_dir(self, input_files, tmp_path):
+        """Test the index is kept in `index_dir` when given."""
+        index_dir = tmp_path / "index"
+
+        build_index(input_files, str(index_dir))
+
+        assert os.path.exists(index_file_name(str(tmp_path), str(index_dir)))
+        assert not os.path.exists(tmp_path / INDEX_FILE_NAME)
+
+
+class TestPruneInputs:
+    """Test cases for prune_inputs function."""
+
+    def test_prune_inputs_time_range(self, input_files):
+        """Test files outside of the time range are not opened."""
+        files, _ = prune_inputs(build_index(input_files), ["2000-01-02 00:00", "2000-01-02 12:00"])
+
+        assert files == [input_files[1]]
+
+    def test_prune_inputs_variables(self, input_files):
+        """Test files without any needed variable are skipped and the other
+        variables are dropped."""
+        files, drop_variables = prune_inputs(build_index(input_files), variables={"t2m", "Tair"})
+
+        assert files == input_files[:2]
+        assert drop_variables == ["extra"]
@@ -0,0 +1,85 @@
+import netCDF4
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from met_preprocessor.incremental import output_coverage, update_groups, update_time_range
+from met_preprocessor.writer import write_file, write_outputs, write_zarr
+
+
+@pytest.fixture
+def output_dataset():
+    """Two days of hourly Tair and Wind on a 2x2 grid."""
+    time = pd.date_range("2024-01-01", periods=48, freq="h")
+    return xr.Dataset(
+        {
+            "Tair": (("time", "lat", "lon"), np.random.rand(48, 2, 2), {"units": "kelvin"}),
+            "Wind": (("time", "lat", "lon"), np.random.rand(48, 2, 2), {"units": "m s-1"}),
+        },
+        coords={"lat": [1.0, 2.0], "lon": [3.0, 4.0], "time": time},
+    )
+
+
+class TestOutputCoverage:
+    """Test cases for output_coverage function."""
+
+    def test_output_coverage(self, tmp_path, output_dataset):
+        """Test time steps and last time of the existing outputs."""
+        output_file = str(tmp_path / "out")
+        write_outputs(output_dataset[["Tair"]], output_file)
+
+        result = output_coverage([f"{output_file}_Tair.nc", f"{output_file}_Wind.nc"])
+
+        assert result == {f"{output_file}_Tair.nc": (48, pd.Timestamp("2024-01-02 23:00"))}
+
+    def test_output_coverage_interrupted_append(self, tmp_path, output_dataset):
+        """Test steps of an interrupted append (data without time) are not covered."""
+        [file_name] = write_outputs(output_dataset[["Tair"]].isel(time=slice(0, 24)), str(tmp_path / "out"))
+        with netCDF4.Dataset(file_name, "a") as nc:
+            nc["Tair"][24:30] = np.ones((6, 2, 2))
+
+        assert output_coverage([file_name]) == {file_name: (24, pd.Timestamp("2024-01-01 23:00"))}
+
+    def test_output_coverage_interrupted_creation(self, tmp_path, output_dataset):
+        """Test outputs set up but whose data was never written are not covered."""
+        file_name = str(tmp_path / "out_Tair.nc")
+        write_file(output_dataset[["Tair"]], file_name)
+
+        assert output_coverage([file_name]) == {}
+
+    def test_output_coverage_interrupted_creation_zarr(self, tmp_path, output_dataset):
+        """Test Zarr stores are only covered once their data is written."""
+        pytest.importorskip("zarr")
+        [written] = write_outputs(output_dataset[["Tair"]], str(tmp_path / "out"), output_format="zarr")
+        store = str(tmp_path / "set_up_Tair.zarr")
+        write_zarr(output_dataset[["Tair"]], store)
+
+        assert list(output_coverage([written, store])) == [written]
+
+class TestUpdateTimeRange:
+    """Test cases for update_time_range function."""
+
+    def test_update_time_range_seam(self):
+        """Test inputs are loaded from one accumulation period before the seam."""
+        result = update_time_range(None, pd.Timestamp("2024-01-31 23:00"))
+
+        assert result == ["2024-01-30 23:00:00", None]
+
+    def test_update_time_range_configured(self):
+        """Test the configured time range still applies."""
+        result = update_time_range(["2024-01-31", "2024-02-29"], pd.Timestamp("2024-01-31 23:00"))
+
+        assert result == ["2024-01-31 00:00:00", "2024-02-29"]
+
+
+class TestUpdateGroups:
+    """Test cases for update_groups function."""
+
+    def test_update_groups(self):
+        """Test output files covering the same steps are extended together."""
+        end = pd.Timestamp("2024-01-31 23:00")
+        coverage = {"a.nc": (744, end), "b.nc": (744, end), "c.nc": (720, end - pd.Timedelta("1D"))}
+
+        result = update_groups({"a.nc": ["Tair"], "b.nc": ["Wind"], "c.nc": ["Qair"]}, coverage)
+
+        assert result == {(744, end): ["Tair", "Wind"], (720, end - pd.Timedelta("1D")): ["Qair"]}
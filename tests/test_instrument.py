@@ -0,0 +1,107 @@
+import json
+import os
+import numpy as np
+import met_preprocessor.instrument as instrument
+from met_preprocessor.instrument import StageRecorder, recording
+
+
+class TestStageRecorder:
+    """Test cases for StageRecorder."""
+
+    def test_stage_metrics(self):
+        """Test a stage records its time, memory and I/O."""
+        recorder = StageRecorder()
+
+        with recorder.stage("rename"):
+            sum(range(10000))
+
+        (record,) = recorder.records
+        assert record["stage"] == "rename"
+        for key in ["wall_s", "cpu_s", "peak_rss_mb", "read_mb", "written_mb"]:
+            assert record[key] >= 0
+
+    def test_stage_bytes_written(self, tmp_path):
+        """Test bytes written during a stage are recorded."""
+        recorder = StageRecorder()
+
+        with recorder.stage("write"):
+            with open(tmp_path / "data.bin", "wb") as file:
+                file.write(os.urandom(2 * 1024**2))
+
+        if os.path.exists(instrument.PROC_IO):
+            assert recorder.records[0]["written_mb"] >= 2
+
+    def test_nested_peak(self):
+        """Test enclosing stages keep the peak memory of nested ones."""
+        recorder = StageRecorder()
+
+        with recorder.stage("outer"):
+            with recorder.stage("inner"):
+                data = np.ones(50 * 1024**2 // 8)
+                data += 1
+            del data
+
+        inner, outer = recorder.records
+        assert outer["peak_rss_mb"] >= inner["peak_rss_mb"]
+
+    def test_output_file(self, tmp_path):
+        """Test stages are appended as JSON lines."""
+        output_file = tmp_path / "stages.jsonl"
+        recorder = StageRecorder(output_file=str(output_file))
+
+        with recorder.stage("open"):
+            pass
+        with recorder.stage("write"):
+            pass
+
+        lines = output_file.read_text().splitlines()
+        assert [json.loads(line)["stage"] for line in lines] == ["open", "write"]
+
+    def test_profile_stage(self, tmp_path, capsys):
+        """Test only the chosen stage is profiled."""
+        profile_file = tmp_path / "calc.prof"
+        recorder = StageRecorder(profile_stage="calc:Qair", profile_file=str(profile_file))
+
+        with recorder.stage("calc:Wind"):
+            pass
+        assert not profile_file.exists()
+        with recorder.stage("calc:Qair"):
+            sorted(range(1000))
+
+        assert profile_file.exists()
+        assert "function calls" in capsys.readouterr().out
+
+    def test_summary(self):
+        """Test the summary totals stages by name, slowest first."""
+        recorder = StageRecorder()
+        recorder.records = [
+            {"stage": name, "wall_s": wall, "cpu_s": 0.0, "peak_rss_mb": 1.0,
+             "read_mb": 0.0, "written_mb": 0.0}
+            for name, wall in [("write", 1.0), ("calc:Qair", 3.0), ("write", 1.5)]
+        ]
+
+        lines = recorder.summary().splitlines()
+
+        assert lines[1].split()[:3] == ["calc:Qair", "1", "3.000"]
+        assert lines[2].split()[:3] == ["write", "2", "2.500"]
+
+
+class TestRecording:
+    """Test cases for the module level stage hook."""
+
+    def test_stage_without_recorder(self):
+        """Test stages are no-ops when not recording."""
+        with instrument.stage("rename"):
+            pass
+
+    def test_recording(self):
+        """Test stages are recorded by the active recorder only."""
+        recorder = StageRecorder()
+
+        with recording(recorder):
+            with instrument.stage("open"):
+                pass
+        with instrument.stage("write"):
+            pass
+
+        assert [record["stage"] for record in recorder.records] == ["open"]
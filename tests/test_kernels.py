@@ -0,0 +1,184 @@
+import warnings
+import numpy as np
+import pytest
+import xarray as xr
+import met_preprocessor.standard_param as standard_param
+import met_preprocessor.opt_param as opt_param
+from met_preprocessor.dependency import process_dependencies
+from met_preprocessor.plan import load_param_map
+from met_preprocessor.kernels import FAST_KERNELS, blockwise, unit_factors, BLOCK_SIZE
+
+rng = np.random.default_rng(seed=42)
+SHAPE = (30, 20, 50)
+
+
+def data_array(values, units, dtype=np.float64):
+    return xr.DataArray(
+        values.astype(dtype), dims=["time", "lat", "lon"], attrs={"units": units}
+    )
+
+
+def reference_and_fast(ref, *args):
+    """Results of the MetPy reference and of its fast kernel."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = ref(*args).metpy.dequantify()
+        result = FAST_KERNELS[ref](*args).metpy.dequantify()
+    return expected, result
+
+
+@pytest.fixture(params=[np.float64, np.float32])
+def sh_inputs(request):
+    """Fixture providing vp (as total pressure), vpd and tair arrays, both
+    above and below freezing."""
+    dtype = request.param
+    return dict(
+        vp=data_array(rng.uniform(800, 1100, SHAPE), "hPa", dtype),
+        vpd=data_array(rng.uniform(0, 50, SHAPE), "hPa", dtype),
+        tair=data_array(rng.uniform(240, 310, SHAPE), "K", dtype),
+        dtype=dtype,
+    )
+
+
+def rtol(dtype):
+    return 1e-12 if dtype == np.float64 else 1e-4
+
+
+class TestFastSpecificHumidity:
+    """Fast specific humidity kernels against the MetPy reference path."""
+
+    def test_vp_vpd_tair_sh(self, sh_inputs):
+        """Test vp_vpd_tair_sh matches MetPy."""
+        vp, vpd, tair = sh_inputs["vp"], sh_inputs["vpd"], sh_inputs["tair"]
+
+        expected, result = reference_and_fast(standard_param.vp_vpd_tair_sh, vp, vpd, tair)
+
+        np.testing.assert_allclose(result, expected, rtol=rtol(sh_inputs["dtype"]))
+        assert result.dtype == sh_inputs["dtype"]
+        assert result.attrs["units"] == "dimensionless"
+
+    def test_vp_tair_sh(self, sh_inputs):
+        """Test vp_tair_sh matches MetPy below freezing (above, both paths
+        divide by a denominator cancelling out to zero)."""
+        vp, tair = sh_inputs["vp"], sh_inputs["tair"]
+        tair = tair.where(tair < 273.15, 260.0)
+
+        expected, result = reference_and_fast(standard_param.vp_tair_sh, vp, tair)
+
+        np.testing.assert_allclose(result, expected, rtol=rtol(sh_inputs["dtype"]))
+
+    def test_vpd_tair_sh(self, sh_inputs):
+        """Test vpd_tair_sh matches MetPy, including undefined values."""
+        vpd, tair = sh_inputs["vpd"], sh_inputs["tair"]
+
+        expected, result = reference_and_fast(standard_param.vpd_tair_sh, vpd, tair)
+
+        np.testing.assert_allclose(
+            result, expected, rtol=rtol(sh_inputs["dtype"]), equal_nan=True
+        )
+
+    def test_units_converted(self, sh_inputs):
+        """Test inputs are converted from their own units."""
+        vp, vpd, tair = sh_inputs["vp"], sh_inputs["vpd"], sh_inputs["tair"]
+        vp_pa = (vp * 100).assign_attrs(units="Pa")
+        tair_c = (tair - 273.15).assign_attrs(units="degC")
+        kernel = FAST_KERNELS[standard_param.vp_vpd_tair_sh]
+
+        result = kernel(vp_pa, vpd, tair_c)
+
+        np.testing.assert_allclose(
+            result, kernel(vp, vpd, tair), rtol=rtol(sh_inputs["dtype"])
+        )
+
+    def test_dask(self, sh_inputs):
+        """Test dask inputs stay lazy and give the numpy results."""
+        vp, vpd, tair = sh_inputs["vp"], sh_inputs["vpd"], sh_inputs["tair"]
+        kernel = FAST_KERNELS[standard_param.vp_vpd_tair_sh]
+
+        result = kernel(vp.chunk(time=7), vpd.chunk(time=7), tair.chunk(time=7))
+
+        assert result.chunks is not None
+        np.testing.assert_array_equal(result.values, kernel(vp, vpd, tair).values)
+
+    def test_wrong_units(self, sh_inputs):
+        """Test inputs of the wrong dimensionality are rejected."""
+        vp, tair = sh_inputs["vp"], sh_inputs["tair"]
+
+        with pytest.raises(Exception, match="can not be converted"):
+            FAST_KERNELS[standard_param.vp_tair_sh](tair, vp)
+
+
+@pytest.fixture(params=[np.float64, np.float32])
+def opt_inputs(request):
+    """Fixture providing temperature (°C), elevation and rain rate arrays."""
+    dtype = request.param
+    return dict(
+        temperature=data_array(rng.uniform(-30, 40, SHAPE), "degC", dtype),
+        elevation=data_array(rng.uniform(0, 3000, SHAPE), "m", dtype),
+        rain=data_array(rng.uniform(0, 0.01, SHAPE), "mm s-1", dtype),
+        dtype=dtype,
+    )
+
+
+class TestFastOptParam:
+    """Fast optional param kernels against the opt_param references."""
+
+    @pytest.mark.parametrize(
+        "ref,args",
+        [
+            (opt_param.calc_lwdown_swinbank, ["temperature"]),
+            (opt_param.calc_psurf, ["temperature", "elevation"]),
+            (opt_param.calc_snow, ["temperature", "rain"]),
+        ],
+    )
+    def test_equivalence(self, opt_inputs, ref, args):
+        """Test each kernel matches its reference, units included."""
+        inputs = [opt_inputs[arg] for arg in args]
+
+        expected, result = reference_and_fast(ref, *inputs)
+
+        # Reference results are computed in the input precision
+        np.testing.assert_allclose(result, expected, rtol=rtol(opt_inputs["dtype"]))
+        assert result.dtype == expected.dtype
+        assert result.attrs["units"] == expected.attrs["units"]
+
+    def test_snow_wrong_units(self, opt_inputs):
+        """Test the rain rate dimensionality is checked."""
+        with pytest.raises(Exception, match="can not be converted"):
+            FAST_KERNELS[opt_param.calc_snow](
+                opt_inputs["temperature"], opt_inputs["elevation"]
+            )
+
+
+class TestFastKernelRegistry:
+    """Test cases for the FAST_KERNELS registry."""
+
+    def test_registry_references(self):
+        """Test every kernel replaces a calculation function of the param map."""
+        funcs = {
+            func
+            for recipes in process_dependencies(load_param_map("param_map.yaml")).values()
+            for _, func in recipes
+        }
+
+        assert set(FAST_KERNELS) <= funcs
+
+
+class TestBlockwise:
+    """Test cases for blockwise function."""
+
+    def test_blockwise_broadcast_and_factors(self):
+        """Test inputs are broadcast and converted before the kernel."""
+        a = np.arange(3 * BLOCK_SIZE, dtype=np.float32).reshape(3, -1)
+        b = np.ones((3, 1))
+
+        result = blockwise(np.add, [(2.0, 1.0), (1.0, -1.0)], a, b)
+
+        np.testing.assert_array_equal(result, 2 * a + 1)
+        assert result.dtype == np.float64
+
+    def test_unit_factors(self):
+        """Test affine factors of a unit conversion."""
+        da = xr.DataArray([0.0], attrs={"units": "degC"})
+
+        assert unit_factors(da, "K") == pytest.approx((1.0, 273.15))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from met_preprocessor.accu import daily_to_hourly_acc
+from met_preprocessor.lazy import ComputeTracker, WRITE_STAGE
+
+
+@pytest.fixture
+def chunked_data():
+    """Two days of dask backed hourly accumulations."""
+    time = pd.date_range("2024-01-01", periods=48, freq="h")
+    return xr.DataArray(
+        np.tile(np.arange(1, 25).cumsum(), (2, 2)),
+        coords={"time": time},
+        dims=["lat", "time"],
+        attrs={"units": "mm"},
+    ).chunk(time=12)
+
+
+class TestComputeTracker:
+    """Test cases for detecting early computes in lazy runs."""
+
+    def test_tracker_records_stage(self, chunked_data):
+        """Test computes are attributed to the active stage."""
+        tracker = ComputeTracker()
+
+        with tracker.activate():
+            with tracker.stage("hourly_acc"):
+                float(chunked_data.sum())
+            with tracker.stage(WRITE_STAGE):
+                chunked_data.load()
+
+        assert [stage for stage, _ in tracker.computes] == ["hourly_acc", WRITE_STAGE]
+        assert [stage for stage, _ in tracker.early_computes()] == ["hourly_acc"]
+
+    def test_tracker_inactive_outside_context(self, chunked_data):
+        """Test computes outside of `activate` are not recorded."""
+        tracker = ComputeTracker()
+
+        chunked_data.load()
+
+        assert tracker.computes == []
+
+    def test_hourly_acc_stays_lazy(self, chunked_data):
+        """Test de-accumulation only builds the graph."""
+        tracker = ComputeTracker()
+
+        with tracker.activate(), tracker.stage("hourly_acc"):
+            result = daily_to_hourly_acc(chunked_data)
+
+        assert tracker.computes == []
+        assert result.chunks is not None
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from met_preprocessor.loader import (
+    file_group_key,
+    group_files_by_variable,
+    open_input_dataset,
+)
+
+
+class TestGroupFilesByVariable:
+    """Test cases for grouping input files per variable."""
+
+    def test_file_group_key_strips_date_range(self):
+        """Test ERA5 style date ranges are removed from the key."""
+        key = file_group_key("/a/ssrd/1950/ssrd_era5-land_oper_sfc_19500101-19500131.nc")
+
+        assert key == "ssrd_era5-land_oper_sfc"
+
+    def test_file_group_key_without_dates(self):
+        """Test files without date stamps keep their stem."""
+        assert file_group_key("/a/b/test_input.nc") == "test_input"
+
+    def test_group_files_by_variable(self):
+        """Test monthly files of each variable are grouped and sorted."""
+        files = [
+            "/d/t2m_sfc_19500201-19500228.nc",
+            "/d/tp_sfc_19500101-19500131.nc",
+            "/d/t2m_sfc_19500101-19500131.nc",
+        ]
+
+        result = group_files_by_variable(files)
+
+        assert result == {
+            "t2m_sfc": [
+                "/d/t2m_sfc_19500101-19500131.nc",
+                "/d/t2m_sfc_19500201-19500228.nc",
+            ],
+            "tp_sfc": ["/d/tp_sfc_19500101-19500131.nc"],
+        }
+
+
+class TestOpenInputDataset:
+    """Test cases for the chunked, grouped loader."""
+
+    @pytest.fixture
+    def monthly_files(self, tmp_path):
+        """Write two variables split into two files each."""
+        files = []
+        for var in ["t2m", "tp"]:
+            for start in ["2000-01-01", "2000-01-03"]:
+                time = pd.date_range(start, periods=48, freq="h")
+                ds = xr.Dataset(
+                    {var: (("time", "latitude", "longitude"), np.ones((48, 3, 4)))},
+                    coords={"time": time, "latitude": [1.0, 2.0, 3.0], "longitude": np.arange(4.0)},
+                )
+                stamp = f"{time[0]:%Y%m%d}-{time[-1]:%Y%m%d}"
+                file_name = tmp_path / f"{var}_sfc_{stamp}.nc"
+                ds.to_netcdf(file_name)
+                files.append(str(file_name))
+        return files
+
+    def test_open_input_dataset_merges_groups(self, monthly_files):
+        """Test all variables are merged along the full time axis."""
+        result = open_input_dataset(monthly_files)
+
+        assert set(result.data_vars) == {"t2m", "tp"}
+        assert result.sizes["time"] == 96
+        assert result.indexes["time"].is_monotonic_increasing
+
+    def test_open_input_dataset_chunks(self, monthly_files):
+        """Test configured chunks are applied and unknown dims are ignored."""
+        result = open_input_dataset(
+            monthly_files, chunks={"time": 24, "latitude": 1, "lat": 5}
+        )
+
+        assert result["t2m"].chunks == ((24, 24, 24, 24), (1, 1, 1), (4,))
+
+    def test_open_input_dataset_drop_variables(self, monthly_files):
+        """Test dropped variables are not opened."""
+        result = open_input_dataset(monthly_files, drop_variables=["tp"])
+
+        assert set(result.data_vars) == {"t2m"}
+
+    def test_open_input_dataset_static_file(self, monthly_files, tmp_path):
+        """Test files without time (e.g. elevation) are opened next to the
+        time-varying groups."""
+        file_name = tmp_path / "dem01.nc"
+        xr.Dataset(
+            {"dem01": (("latitude", "longitude"), np.arange(12.0).reshape(3, 4), {"units": "m"})},
+            coords={"latitude": [1.0, 2.0, 3.0], "longitude": np.arange(4.0)},
+        ).to_netcdf(file_name)
+
+        result = open_input_dataset(monthly_files + [str(file_name)])
+
+        assert result["dem01"].dims == ("latitude", "longitude")
+        assert result["dem01"].values[2, 3] == 11.0
+        assert result["t2m"].sizes["time"] == 96
@@ -0,0 +1,263 @@
+import os
+import dask
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+import met_preprocessor.met_preprocessing as met_preprocessing
+from met_preprocessor.met_preprocessing import run_pipeline
+from met_preprocessor.tiling import map_tiles
+from met_preprocessor.plan import load_param_map
+from met_preprocessor.writer import open_outputs
+
+PARAM_MAP_FILE = "param_map.yaml"
+# Uneven tiles of the 5x6 grid
+TILE_SIZE = {"latitude": 2, "longitude": 4}
+ACCUMULATED = {"ssrd": "J m**-2", "strd": "J m**-2", "tp": "m"}
+
+
+@pytest.fixture
+def era5_param_map():
+    return load_param_map(PARAM_MAP_FILE)
+
+
+@pytest.fixture
+def era5_dataset():
+    """Three days of ERA5-Land like hourly inputs on a 5x6 grid, the
+    radiation and precipitation accumulated since midnight."""
+    rng = np.random.default_rng(seed=42)
+    time = pd.date_range("1950-01-01", periods=72, freq="h")
+    shape = (72, 5, 6)
+    dims = ("time", "latitude", "longitude")
+    day = np.arange(72) // 24
+
+    def accumulated(scale):
+        hourly = rng.uniform(0, scale, shape).astype("float32")
+        return np.stack([hourly[day == d].cumsum(axis=0) for d in range(3)]).reshape(shape)
+
+    data = {
+        "t2m": (dims, rng.uniform(250, 310, shape).astype("float32"), {"units": "K"}),
+        "d2m": (dims, rng.uniform(240, 250, shape).astype("float32"), {"units": "K"}),
+        "sp": (dims, rng.uniform(9e4, 1.05e5, shape).astype("float32"), {"units": "Pa"}),
+        "u10": (dims, rng.uniform(-10, 10, shape).astype("float32"), {"units": "m s**-1"}),
+        "v10": (dims, rng.uniform(-10, 10, shape).astype("float32"), {"units": "m s**-1"}),
+    }
+    for var, scale in [("ssrd", 3e6), ("strd", 1.5e6), ("tp", 1e-3)]:
+        data[var] = (dims, accumulated(scale), {"units": ACCUMULATED[var]})
+    return xr.Dataset(
+        data,
+        coords={"time": time, "latitude": np.linspace(90, -90, 5), "longitude": np.arange(0.0, 360, 60)},
+    )
+
+
+def run(dataset, param_map, output_file, **config):
+    """Outputs written by a run of `config`, loaded."""
+    config = dict({"output_file": str(output_file), "hourly_acc": ["SWDown", "LWDown", "Rainf"]}, **config)
+    run_pipeline(dataset, config, param_map).close()
+    return load_outputs(output_file)
+
+
+def load_outputs(output_file):
+    files = sorted(output_file.parent.glob(f"{output_file.name}_*.nc"))
+    with open_outputs([str(file) for file in files]) as outputs:
+        return outputs.load()
+
+
+class TestRunMetWindows:
+    """Test cases for streaming runs in time windows."""
+
+    @pytest.mark.parametrize("time_window", ["1D", "30h"])
+    def test_run_met_windows_single_pass(self, tmp_path, era5_dataset, era5_param_map, time_window):
+        """Test windowed outputs equal a single pass, de-accumulation
+        included across day boundaries."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "windows", time_window=time_window)
+
+        assert result.identical(expected)
+        assert {"SWDown", "LWDown", "Rainf"} <= set(result.data_vars)
+
+    def test_run_met_windows_default_co2(self, tmp_path, era5_dataset, era5_param_map):
+        """Test the default CO2 is written as 350 ppm in every window."""
+        result = run(era5_dataset, era5_param_map, tmp_path / "windows", time_window="1D")
+
+        assert (result["CO2air"] == 350).all()
+        assert result["CO2air"].attrs["units"] == "ppm"
+
+    def test_run_met_windows_cftime(self, tmp_path, era5_dataset, era5_param_map):
+        """Test windows of a non-standard calendar equal a single pass."""
+        time = xr.date_range("1950-01-01", periods=72, freq="h", calendar="noleap", use_cftime=True)
+        dataset = era5_dataset.assign_coords(time=time)
+        expected = run(dataset, era5_param_map, tmp_path / "full")
+
+        result = run(dataset, era5_param_map, tmp_path / "windows", time_window="1D")
+
+        assert result.identical(expected)
+
+
+class TestRunMetTimeRange:
+    """Test cases for runs of a time range."""
+
+    @pytest.mark.parametrize(
+        "config",
+        [{}, {"time_window": "1D"}, {"lazy": True}, {"tile_size": TILE_SIZE, "tile_workers": 2}],
+    )
+    def test_run_met_time_range(self, tmp_path, era5_dataset, era5_param_map, config):
+        """Test a time range starting mid-day equals the same steps of a
+        full run, its inputs de-accumulated from the preceding day."""
+        time_range = ["1950-01-02 06:00", "1950-01-03 12:00"]
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full").sel(time=slice(*time_range))
+        os.makedirs(tmp_path / "inputs")
+        era5_dataset.to_netcdf(tmp_path / "inputs" / "era5.nc")
+
+        result = run(
+            None,
+            era5_param_map,
+            tmp_path / "out",
+            directories=[str(tmp_path / "inputs")],
+            time_range=time_range,
+            **config,
+        )
+
+        assert result.identical(expected)
+
+
+class TestRunMetLazy:
+    """Test cases for lazy runs."""
+
+    def test_run_met_lazy(self, tmp_path, era5_dataset, era5_param_map):
+        """Test lazy outputs equal eager ones."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "eager")
+
+        result = run(era5_dataset.chunk({"time": 24}), era5_param_map, tmp_path / "lazy", lazy=True)
+
+        assert result.identical(expected)
+
+    def test_run_met_lazy_time_window(self, tmp_path, era5_dataset, era5_param_map):
+        """Test lazy runs can not be streamed in windows."""
+        with pytest.raises(Exception, match="lazy can not be combined with time_window"):
+            run(era5_dataset, era5_param_map, tmp_path / "out", lazy=True, time_window="1D")
+
+
+class TestRunMetTiled:
+    """Test cases for runs in spatial tiles."""
+
+    def test_run_met_tiled(self, tmp_path, era5_dataset, era5_param_map):
+        """Test stitched tiles equal the untiled outputs and are removed."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "tiled", tile_size=TILE_SIZE, tile_workers=2)
+
+        assert result.identical(expected)
+        assert not os.path.exists(tmp_path / "tiled_tiles")
+
+    @pytest.mark.parametrize("checkpoint", [False, True])
+    def test_run_met_tiled_failure(self, tmp_path, era5_dataset, era5_param_map, monkeypatch, checkpoint):
+        """Test tiles of a failed run are only kept for resuming its checkpoint."""
+
+        def stitch_tiles(datasets, tiles):
+            raise Exception("Stitching failed")
+
+        monkeypatch.setattr(met_preprocessing, "stitch_tiles", stitch_tiles)
+
+        with pytest.raises(Exception, match="Stitching failed"):
+            run(era5_dataset, era5_param_map, tmp_path / "tiled", tile_size=TILE_SIZE, tile_workers=2, checkpoint=checkpoint)
+
+        assert os.path.exists(tmp_path / "tiled_tiles") == checkpoint
+
+
+class TestCheckpointResume:
+    """Test cases for resuming interrupted checkpointed runs."""
+
+    def test_resume_windows(self, tmp_path, era5_dataset, era5_param_map, monkeypatch, capsys):
+        """Test a run interrupted while appending its third window resumes
+        after the completed windows, overwriting the partial append."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+        write_dataset = met_preprocessing.write_dataset
+        writes = []
+
+        def interrupted_write(dataset, config, append=False, start=None):
+            writes.append(start)
+            if len(writes) == 3:
+                write_dataset(dataset.isel(time=slice(0, 5)), config, append, start)
+                raise Exception("Walltime exceeded")
+            return write_dataset(dataset, config, append, start)
+
+        monkeypatch.setattr(met_preprocessing, "write_dataset", interrupted_write)
+        with pytest.raises(Exception, match="Walltime exceeded"):
+            run(era5_dataset, era5_param_map, tmp_path / "out", time_window="1D", checkpoint=True)
+        monkeypatch.setattr(met_preprocessing, "write_dataset", write_dataset)
+        capsys.readouterr()
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "out", time_window="1D", resume=True)
+
+        assert capsys.readouterr().out.count("Checkpoint: Skipping completed window") == 2
+        assert writes == [0, 24, 48]
+        assert result.identical(expected)
+
+    def test_resume_tiles(self, tmp_path, era5_dataset, era5_param_map, monkeypatch, capsys):
+        """Test a tiled run interrupted after its first tile only runs the others."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+
+        def interrupted_map_tiles(func, jobs, done=None, **kwargs):
+            map_tiles(func, jobs[:1], done=done, **kwargs)
+            raise Exception("Walltime exceeded")
+
+        monkeypatch.setattr(met_preprocessing, "map_tiles", interrupted_map_tiles)
+        config = {"tile_size": TILE_SIZE, "tile_workers": 2}
+        with pytest.raises(Exception, match="Walltime exceeded"):
+            run(era5_dataset, era5_param_map, tmp_path / "out", checkpoint=True, **config)
+        monkeypatch.setattr(met_preprocessing, "map_tiles", map_tiles)
+        capsys.readouterr()
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "out", resume=True, **config)
+
+        out = capsys.readouterr().out
+        assert "Checkpoint: Skipping completed tile 0" in out
+        assert "Processing 5 of 6 tiles" in out
+        assert result.identical(expected)
+
+
+class TestRunMetUpdate:
+    """Test cases for update runs."""
+
+    @pytest.mark.parametrize("time_window", [None, "1D"])
+    def test_run_met_update(self, tmp_path, era5_dataset, era5_param_map, capsys, time_window):
+        """Test updating outputs of the first days (ending mid-day) with the
+        next one equals a single full run, de-accumulation at the seam included."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+        config = {"update": True, "time_window": time_window}
+        run(era5_dataset.isel(time=slice(0, 34)), era5_param_map, tmp_path / "out", **config)
+        capsys.readouterr()
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "out", **config)
+
+        assert "Update: Appending 1950-01-02 09:00:00 - 1950-01-03 23:00:00" in capsys.readouterr().out
+        assert result.identical(expected)
+        assert {"SWDown", "Rainf"} <= set(result.data_vars)
+
+    def test_run_met_update_up_to_date(self, tmp_path, era5_dataset, era5_param_map, capsys):
+        """Test outputs covering the inputs are left as they are."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "out")
+        capsys.readouterr()
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "out", update=True)
+
+        assert "Update: Outputs are up to date" in capsys.readouterr().out
+        assert result.identical(expected)
+
+    def test_run_met_update_interrupted_creation(self, tmp_path, era5_dataset, era5_param_map, monkeypatch):
+        """Test outputs whose first write was interrupted are processed again."""
+        expected = run(era5_dataset, era5_param_map, tmp_path / "full")
+
+        def interrupted_compute(*args, **kwargs):
+            raise Exception("Walltime exceeded")
+
+        monkeypatch.setattr(dask, "compute", interrupted_compute)
+        with pytest.raises(Exception, match="Walltime exceeded"):
+            run(era5_dataset.isel(time=slice(0, 48)), era5_param_map, tmp_path / "out", update=True)
+        monkeypatch.undo()
+
+        result = run(era5_dataset, era5_param_map, tmp_path / "out", update=True)
+
+        assert result.identical(expected)
@@ -222,8 +222,7 @@ class TestDefaultCo2:
         result = default_co2(coords, dims)
 
         assert result is not None
-        # 350 ppm
-        assert float(result) == pytest.approx(0.00035, rel=1e-6)
+        assert float(result) == 350
 
     def test_default_co2_with_coords(self):
         """Test CO2 creation with coordinates."""
@@ -244,3 +243,14 @@ class TestDefaultCo2:
         result = default_co2(coords, dims)
 
         assert result.attrs["units"] == "ppm"
+
+    def test_default_co2_compact(self):
+        """Test CO2 is stored as a single value broadcast over the dataset."""
+        time = pd.date_range("2024-01-01", periods=24, freq="h")
+        coords = {"time": time, "lat": np.arange(100.0), "lon": np.arange(200.0)}
+
+        result = default_co2(coords, {"time": 24, "lat": 100, "lon": 200})
+
+        assert result.shape == (24, 100, 200)
+        assert result.data.strides == (0, 0, 0)
+        assert float(result[5, 50, 150]) == 350
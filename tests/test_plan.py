@@ -0,0 +1,104 @@
+import os
+import pytest
+import met_preprocessor.plan as plan
+from met_preprocessor.dependency import generate_calculations
+from met_preprocessor.plan import (
+    calculation_plan,
+    load_param_map,
+    plan_key,
+    plan_file_name,
+    prune_calculations,
+    required_params,
+)
+
+TEST_PARAM_MAP_FILE = "tests/data/test_param_map.yaml"
+
+
+@pytest.fixture(autouse=True)
+def empty_plan_cache(monkeypatch):
+    """Fixture starting every test without memoized plans."""
+    monkeypatch.setattr(plan, "PLAN_CACHE", {})
+
+
+class TestPlanKey:
+    """Test cases for plan_key function."""
+
+    def test_plan_key_input_order(self, param_map):
+        """Test the key only depends on the set of input variables."""
+        assert plan_key(param_map, ["t2m", "sp"]) == plan_key(param_map, ["sp", "t2m", "sp"])
+
+    def test_plan_key_changes(self, param_map):
+        """Test the key changes with the inputs and the param map."""
+        key = plan_key(param_map, ["Tair"])
+
+        assert plan_key(param_map, ["Tair", "vpd"]) != key
+        assert plan_key(dict(param_map, Extra={"type": "optional"}), ["Tair"]) != key
+
+
+class TestCalculationPlan:
+    """Test cases for calculation_plan function."""
+
+    def test_calculation_plan_matches(self, param_map, sample_xarray_data):
+        """Test the plan is the one resolved by generate_calculations."""
+        dataset = sample_xarray_data.rename(t2m="Tair")
+
+        result = calculation_plan(dataset, param_map)
+
+        assert result == generate_calculations(dataset, param_map)
+
+    def test_calculation_plan_memoized(self, param_map, sample_xarray_data, monkeypatch):
+        """Test the plan is only resolved once per key."""
+        calls = []
+        monkeypatch.setattr(
+            plan, "generate_calculations", lambda *args: calls.append(args) or []
+        )
+
+        calculation_plan(sample_xarray_data, param_map)
+        calculation_plan(sample_xarray_data, param_map)
+
+        assert len(calls) == 1
+
+    def test_calculation_plan_persisted(self, param_map, sample_xarray_data, tmp_path, monkeypatch):
+        """Test a plan saved on disk is reloaded by a new process."""
+        dataset = sample_xarray_data.rename(t2m="Tair")
+        expected = calculation_plan(dataset, param_map, str(tmp_path))
+        assert expected
+        assert os.path.exists(plan_file_name(str(tmp_path), plan_key(param_map, dataset.keys())))
+
+        monkeypatch.setattr(plan, "PLAN_CACHE", {})
+        monkeypatch.setattr(plan, "generate_calculations", None)
+
+        assert calculation_plan(dataset, param_map, str(tmp_path)) == expected
+
+
+class TestLoadParamMap:
+    """Test cases for load_param_map function."""
+
+    def test_load_param_map(self, param_map):
+        """Test the file is parsed once while unchanged."""
+        result = load_param_map(TEST_PARAM_MAP_FILE)
+
+        assert result == param_map
+        assert load_param_map(TEST_PARAM_MAP_FILE) is result
+
+
+class TestRequiredParams:
+    """Test cases for required_params and prune_calculations functions."""
+
+    CALCULATIONS = [
+        ("vp", ["Tair"], None),
+        ("Qair", ["vp", "PSurf"], None),
+        ("LWDown", ["Tair"], None),
+        ("CO2air", [], None),
+    ]
+
+    def test_required_params(self):
+        """Test outputs are walked back to every param they depend on."""
+        assert required_params(self.CALCULATIONS, ["Qair"]) == {"Qair", "vp", "Tair", "PSurf"}
+        assert required_params(self.CALCULATIONS, ["Rainf"]) == {"Rainf"}
+
+    def test_prune_calculations(self):
+        """Test only the calculations leading to the outputs are kept."""
+        result = prune_calculations(self.CALCULATIONS, ["Qair", "CO2air"])
+
+        assert [param for param, _, _ in result] == ["vp", "Qair", "CO2air"]
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+import xarray as xr
+
+from met_preprocessor.streaming import time_windows
+
+
+class TestTimeWindows:
+    """Test cases for splitting the time axis into windows."""
+
+    @pytest.fixture
+    def hourly_times(self):
+        """Three days of hourly times."""
+        return pd.date_range("2024-01-01", periods=72, freq="h")
+
+    def test_time_windows_cover_all_times(self, hourly_times):
+        """Test kept slices cover every time exactly once."""
+        kept = []
+        for load, keep in time_windows(hourly_times, "1D", pd.Timedelta(0)):
+            kept.extend(hourly_times[load][keep])
+
+        assert pd.DatetimeIndex(kept).equals(hourly_times)
+
+    def test_time_windows_without_overlap(self, hourly_times):
+        """Test daily windows load exactly their own day."""
+        result = list(time_windows(hourly_times, "1D", pd.Timedelta(0)))
+
+        assert result[1] == (slice(24, 48), slice(0, None))
+
+    def test_time_windows_with_overlap(self, hourly_times):
+        """Test windows load the preceding overlap, which is then dropped."""
+        result = list(time_windows(hourly_times, "1D", pd.Timedelta(days=1)))
+
+        assert result[0] == (slice(0, 24), slice(0, None))
+        assert result[2] == (slice(24, 72), slice(24, None))
+
+    def test_time_windows_partial_window(self, hourly_times):
+        """Test windows not aligned to days still overlap a full day."""
+        result = list(time_windows(hourly_times, "30h", pd.Timedelta(days=1)))
+
+        assert result[1] == (slice(6, 60), slice(24, None))
+
+    def test_time_windows_start(self, hourly_times):
+        """Test windows start at `start`, still loading the overlap before it."""
+        result = list(time_windows(hourly_times, "1D", pd.Timedelta(days=1), start="2024-01-02 06:00"))
+
+        assert result[0] == (slice(6, 48), slice(24, None))
+        assert len(result) == 2
+
+    def test_time_windows_cftime(self):
+        """Test windows of a non-standard calendar."""
+        times = xr.date_range("2001-02-27", periods=72, freq="h", calendar="noleap", use_cftime=True)
+
+        result = list(time_windows(times, "1D", pd.Timedelta(days=1)))
+
+        assert result[1] == (slice(0, 48), slice(24, None))
+        assert times[result[2][0]][result[2][1]][0] == times[48]
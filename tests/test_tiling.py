@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from met_preprocessor.tiling import map_tiles, spatial_tiles, stitch_tiles
+
+
+@pytest.fixture
+def grid_data():
+    """Fixture of a 5x7 grid with two time steps."""
+    return xr.Dataset(
+        {"Tair": (("time", "latitude", "longitude"), np.arange(70.0).reshape(2, 5, 7))},
+        coords={
+            "time": pd.date_range("2000-01-01", periods=2, freq="h"),
+            "latitude": np.linspace(90, -90, 5),
+            "longitude": np.arange(7.0),
+        },
+    )
+
+
+class TestSpatialTiles:
+    """Test cases for spatial_tiles function."""
+
+    def test_spatial_tiles_cover_grid(self):
+        """Test tiles are row-major and the last ones are partial."""
+        result = spatial_tiles({"time": 2, "latitude": 5, "longitude": 7}, {"latitude": 3, "longitude": 4})
+
+        assert result == [
+            {"latitude": slice(0, 3), "longitude": slice(0, 4)},
+            {"latitude": slice(0, 3), "longitude": slice(4, 7)},
+            {"latitude": slice(3, 5), "longitude": slice(0, 4)},
+            {"latitude": slice(3, 5), "longitude": slice(4, 7)},
+        ]
+
+    def test_spatial_tiles_missing_dims(self):
+        """Test dimensions absent from the data are ignored."""
+        result = spatial_tiles({"lat": 4, "lon": 2}, {"lat": 2, "latitude": 10})
+
+        assert result == [{"lat": slice(0, 2)}, {"lat": slice(2, 4)}]
+
+
+class TestStitchTiles:
+    """Test cases for stitch_tiles function."""
+
+    @pytest.mark.parametrize("tile_size", [{"latitude": 2, "longitude": 3}, {"longitude": 4}, {}])
+    def test_stitch_tiles_roundtrip(self, grid_data, tile_size):
+        """Test stitching the tiles gives back the full grid."""
+        tiles = spatial_tiles(grid_data.sizes, tile_size)
+
+        result = stitch_tiles([grid_data.isel(tile) for tile in tiles], tiles)
+
+        assert result.identical(grid_data)
+
+
+class TestMapTiles:
+    """Test cases for map_tiles function."""
+
+    def test_map_tiles_processes(self):
+        """Test jobs run in worker processes, results in job order."""
+        assert map_tiles(pow, [(2, 3), (3, 2), (10, 1)], workers=2) == [8, 9, 10]
+
+    def test_map_tiles_unknown_scheduler(self):
+        """Test unknown schedulers are rejected."""
+        with pytest.raises(Exception, match="Unknown tile_scheduler: threads"):
+            map_tiles(pow, [(2, 3)], scheduler="threads")
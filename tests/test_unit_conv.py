@@ -1,6 +1,11 @@
-from met_preprocessor.unit_conv import UnitConversion
+from concurrent.futures import ThreadPoolExecutor
+from met_preprocessor.unit_conv import UnitConversion, CONTEXTS, UNIT_DEFINITIONS_FILE, context_names
+from met_preprocessor.constant import constant_field, is_constant_field
 from met_preprocessor.met_preprocessing import get_unit_conv_params
+import numpy as np
+import pandas as pd
 import pytest
+import xarray as xr
 
 
 @pytest.fixture(scope="module")
@@ -14,4 +19,165 @@ def param_conv(unit_conv_params):
 
 
 def test_unit_conv(sample_xarray_data, param_conv):
-    print(param_conv.convert_param(sample_xarray_data["t2m"], "kelvin"))
\ No newline at end of file
+    print(param_conv.convert_param(sample_xarray_data["t2m"], "kelvin"))
+
+class TestConversionPlan:
+    """Test cases for cached affine conversion plans."""
+
+    @pytest.mark.parametrize(
+        "old_unit,new_unit,scale,offset",
+        [
+            ("J m**-2 hr**-1", "W m-2", 1 / 3600, 0.0),
+            ("hPa", "Pa", 100.0, 0.0),
+            ("degC", "kelvin", 1.0, 273.15),
+        ],
+    )
+    def test_build_plan_affine(self, old_unit, new_unit, scale, offset):
+        """Test multiplicative and offset conversions get a plan."""
+        plan = UnitConversion._build_plan(old_unit, new_unit)
+
+        assert plan.scale == pytest.approx(scale)
+        assert plan.offset == pytest.approx(offset)
+
+    def test_build_plan_inexact_falls_back(self):
+        """Test conversions not reproduced exactly are left to pint."""
+        plan = UnitConversion._build_plan("degF", "kelvin")
+
+        assert plan.scale is None
+
+    def test_convert_matches_pint(self, sample_xarray_data, param_conv):
+        """Test planned conversions are identical to pint's, attrs included."""
+        da = sample_xarray_data["ssrd"].copy()
+        da.attrs["units"] = "J m**-2 hr**-1"
+
+        expected = UnitConversion._convert_units(da, "W m-2")
+        result = param_conv._convert(da, "W m-2", "SWDown")
+
+        assert result.identical(expected)
+        assert ("J m**-2 hr**-1", "W m-2", "SWDown") in param_conv.plans
+
+    def test_convert_stays_lazy(self, sample_xarray_data, param_conv):
+        """Test plans are applied blockwise on dask data."""
+        da = sample_xarray_data["t2m"].chunk(time=6)
+
+        result = param_conv._convert(da, "degC", "Tair")
+
+        assert result.chunks == da.chunks
+        assert result.attrs["units"] == "degree_Celsius"
+        assert np.array_equal(result.values, da.values - 273.15)
+
+    def test_convert_constant_field(self, param_conv):
+        """Test constant fields are converted without being expanded."""
+        da = xr.DataArray(
+            constant_field(1.5, (24, 100, 100)),
+            dims=["time", "lat", "lon"],
+            attrs={"units": "hPa"},
+        )
+
+        result = param_conv._convert(da, "Pa", "PSurf")
+
+        assert is_constant_field(result.data)
+        assert result.shape == da.shape
+        assert float(result[0, 0, 0]) == pytest.approx(150.0)
+
+
+class TestMonthlyConversions:
+    """Test cases for monthly to daily conversions."""
+
+    @pytest.fixture
+    def monthly_rain(self):
+        """Monthly rainfall of 1 mm per day over a leap year."""
+        time = pd.date_range("2024-01-01", periods=12, freq="MS")
+        return xr.DataArray(
+            time.days_in_month.values.astype(float),
+            coords={"time": time},
+            dims=["time"],
+            name="Rainf",
+            attrs={"units": "mm month**-1"},
+        )
+
+    def test_monthly_conversions(self, monthly_rain, param_conv):
+        """Test each month is divided by its own length."""
+        result = param_conv._monthly_conversions(monthly_rain)
+
+        assert np.allclose(result.values, 1)
+        assert result.attrs["units"] == "millimeter / day"
+
+    def test_monthly_conversions_cftime(self, monthly_rain, param_conv):
+        """Test month lengths follow non-standard calendars."""
+        time = xr.date_range(
+            "2024-01-01", periods=12, freq="MS", calendar="noleap", use_cftime=True
+        )
+        monthly_rain = monthly_rain.assign_coords(time=time)
+
+        result = param_conv._monthly_conversions(monthly_rain)
+
+        assert result.values[1] == pytest.approx(29 / 28)
+
+    def test_monthly_rainf_mass_flux(self, monthly_rain, param_conv):
+        """Test monthly precipitation depths convert to mass fluxes in the
+        context of their param."""
+        result = param_conv.convert_param(monthly_rain, "kg m-2 s-1")
+
+        assert np.allclose(result.values, 1 / 86400)
+        assert result.name == "Rainf"
+
+    def test_monthly_conversions_threads(self, monthly_rain, param_conv):
+        """Test concurrent conversions do not interfere with each other."""
+        expected = param_conv._monthly_conversions(monthly_rain)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(
+                    param_conv._monthly_conversions,
+                    [monthly_rain.isel(time=slice(i, None)) for i in range(8)],
+                )
+            )
+
+        for i, result in enumerate(results):
+            assert result.equals(expected.isel(time=slice(i, None)))
+
+
+class TestRegistry:
+    """Test cases for the shared, once-loaded unit registry."""
+
+    def test_multiple_instances(self, unit_conv_params, param_conv):
+        """Test further instances reuse the registry and plans."""
+        other = UnitConversion(unit_conv_params)
+
+        assert other.plans is param_conv.plans
+
+    def test_rainf_context(self, param_conv):
+        """Test precipitation depth rates convert to mass fluxes for Rainf."""
+        da = xr.DataArray([1.0, 2.0], dims="time", name="Rainf", attrs={"units": "mm s-1"})
+
+        result = param_conv.convert_param(da, "kg m-2 s-1")
+
+        assert np.allclose(result.values, [1.0, 2.0])
+
+    def test_context_names(self, param_conv):
+        """Test the contexts of the definitions file are tracked."""
+        assert context_names(UNIT_DEFINITIONS_FILE) == ["Rainf"]
+        assert "Rainf" in CONTEXTS
+
+    def test_celsius_alias(self, param_conv):
+        """Test `Celsius` keeps the offset of degrees Celsius."""
+        da = xr.DataArray([0.0, 10.0], dims="time", name="Tair", attrs={"units": "Celsius"})
+
+        result = param_conv.convert_param(da, "kelvin")
+
+        assert np.allclose(result.values, [273.15, 283.15])
+
+    def test_concurrent_conversions(self, sample_xarray_data, unit_conv_params):
+        """Test conversions from several threads and instances agree."""
+        da = sample_xarray_data["ssrd"].rename("SWDown")
+        da.attrs["units"] = "J m**-2 hr**-1"
+        expected = UnitConversion._convert_units(da, "W m-2")
+
+        def convert(_):
+            return UnitConversion(unit_conv_params).convert_param(da, "W m-2")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(convert, range(8)))
+
+        assert all(result.identical(expected) for result in results)
@@ -1,10 +1,11 @@
+import json
 import os
 import tempfile
 from pathlib import Path
 
 import pytest
 
-from met_preprocessor.utils import list_nc_files
+from met_preprocessor.utils import list_nc_files, write_json_atomic
 
 
 class TestListNcFiles:
@@ -90,4 +91,30 @@ class TestListNcFiles:
         with tempfile.TemporaryDirectory() as tmpdir:
             result = list_nc_files(tmpdir)
 
-            assert result == []
\ No newline at end of file
+            assert result == []
+
+    def test_list_nc_files_only_matches_suffix(self):
+        """Test temporary and NcML files containing `.nc` are excluded."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            nc_file = Path(tmpdir) / "data.nc"
+            nc_file.touch()
+            (Path(tmpdir) / "data.nc.tmp").touch()
+            (Path(tmpdir) / "data.ncml").touch()
+
+            result = list_nc_files(tmpdir)
+
+            assert result == [str(nc_file)]
+
+
+class TestWriteJsonAtomic:
+    """Test suite for write_json_atomic function."""
+
+    def test_write_json_atomic(self, tmp_path):
+        """Test the content replaces the file without a temporary file left."""
+        file_name = tmp_path / "cache" / "content.json"
+        write_json_atomic(str(file_name), {"version": 1})
+
+        write_json_atomic(str(file_name), {"version": 2})
+
+        assert json.loads(file_name.read_text()) == {"version": 2}
+        assert os.listdir(tmp_path / "cache") == ["content.json"]
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from met_preprocessor.constant import constant_field, is_constant_field
+from met_preprocessor.lazy import ComputeTracker
+from met_preprocessor.writer import (
+    COMPRESSION,
+    chunk_constant_fields,
+    combined_file_name,
+    open_outputs,
+    output_file_name,
+    variable_encoding,
+    write_outputs,
+)
+
+
+@pytest.fixture
+def output_dataset():
+    """Two days of hourly output on a 2x2 grid."""
+    time = pd.date_range("2024-01-01", periods=48, freq="h")
+    return xr.Dataset(
+        {
+            "Tair": (("lat", "lon", "time"), np.random.rand(2, 2, 48), {"units": "kelvin"}),
+            "Wind": (("lat", "lon", "time"), np.random.rand(2, 2, 48), {"units": "m s-1"}),
+        },
+        coords={"lat": [1.0, 2.0], "lon": [3.0, 4.0], "time": time},
+    )
+
+
+class TestWriteOutputs:
+    """Test cases for writing per-variable output files."""
+
+    def test_write_outputs_per_variable(self, tmp_path, output_dataset):
+        """Test each variable is written into its own file."""
+        output_file = str(tmp_path / "out")
+
+        result = write_outputs(output_dataset, output_file)
+
+        assert result == [output_file_name(output_file, v) for v in ["Tair", "Wind"]]
+        with xr.open_dataset(result[0]) as ds:
+            assert ds["Tair"].equals(output_dataset["Tair"])
+
+    def test_write_outputs_append(self, tmp_path, output_dataset):
+        """Test appending windows along time reproduces the full record."""
+        output_file = str(tmp_path / "out")
+
+        write_outputs(output_dataset.isel(time=slice(0, 24)), output_file)
+        result = write_outputs(
+            output_dataset.isel(time=slice(24, None)), output_file, append=True
+        )
+
+        with xr.open_dataset(result[1]) as ds:
+            assert ds.indexes["time"].equals(output_dataset.indexes["time"])
+            assert ds["Wind"].equals(output_dataset["Wind"])
+
+    def test_write_outputs_append_start(self, tmp_path, output_dataset):
+        """Test appends from `start` overwrite steps left by an interrupted append."""
+        output_file = str(tmp_path / "out")
+        write_outputs(output_dataset.isel(time=slice(0, 24)), output_file)
+        write_outputs(output_dataset.isel(time=slice(24, 30)) * 0, output_file, append=True)
+
+        result = write_outputs(
+            output_dataset.isel(time=slice(24, None)), output_file, append=True, start=24
+        )
+
+        with xr.open_dataset(result[0]) as ds:
+            assert ds["Tair"].equals(output_dataset["Tair"])
+
+    def test_write_outputs_combined(self, tmp_path, output_dataset):
+        """Test all variables can be written into a single file."""
+        output_file = str(tmp_path / "out")
+
+        result = write_outputs(output_dataset, output_file, combined=True)
+
+        assert result == [combined_file_name(output_file)]
+        with xr.open_dataset(result[0]) as ds:
+            assert ds.equals(output_dataset)
+
+    def test_write_outputs_single_compute(self, tmp_path, output_dataset):
+        """Test outputs sharing a graph are computed in one pass."""
+        output_file = str(tmp_path / "out")
+        tair = output_dataset["Tair"].chunk(time=12)
+        dataset = xr.Dataset({"Tair": tair, "Wind": tair * 2})
+        tracker = ComputeTracker()
+
+        with tracker.activate():
+            write_outputs(dataset, output_file)
+
+        assert len(tracker.computes) == 1
+
+    def test_write_outputs_replaces_source_encoding(self, tmp_path, output_dataset):
+        """Test stale encodings of the inputs do not clash with compression."""
+        output_file = str(tmp_path / "out")
+        output_dataset["Tair"].encoding = {"contiguous": True, "chunksizes": None}
+
+        result = write_outputs(output_dataset, output_file)
+
+        with xr.open_dataset(result[0]) as ds:
+            assert ds["Tair"].encoding["zlib"]
+
+
+class TestConstantFields:
+    """Test cases for writing constant fields."""
+
+    @pytest.fixture
+    def constant_dataset(self, output_dataset):
+        """Output dataset with a constant CO2air field."""
+        return output_dataset.assign(
+            CO2air=(("lat", "lon", "time"), constant_field(3.5e-4, (2, 2, 48)))
+        )
+
+    def test_chunk_constant_fields(self, constant_dataset):
+        """Test only constant fields are split into time step chunks."""
+        result = chunk_constant_fields(constant_dataset)
+
+        assert result["CO2air"].chunks == ((2,), (2,), (1,) * 48)
+        assert result["Tair"].chunks is None
+        assert is_constant_field(constant_dataset["CO2air"].data)
+
+    @pytest.mark.parametrize("append", [False, True])
+    def test_write_constant_field(self, tmp_path, constant_dataset, append):
+        """Test constant fields are written (and appended) as full fields."""
+        output_file = str(tmp_path / "out")
+
+        write_outputs(constant_dataset.isel(time=slice(0, 24)), output_file)
+        if append:
+            write_outputs(
+                constant_dataset.isel(time=slice(24, None)), output_file, append=True
+            )
+
+        with xr.open_dataset(output_file_name(output_file, "CO2air")) as ds:
+            assert ds.sizes["time"] == (48 if append else 24)
+            assert (ds["CO2air"] == 3.5e-4).all()
+
+
+class TestVariableEncoding:
+    """Test cases for per-variable output encodings."""
+
+    def test_variable_encoding_default(self, output_dataset):
+        """Test variables fall back to the default compression."""
+        assert variable_encoding(output_dataset["Tair"], {}) == COMPRESSION
+
+    def test_variable_encoding_override(self, output_dataset):
+        """Test variable entries update the configured default."""
+        output_encoding = {
+            "default": {"zlib": True, "complevel": 1},
+            "Tair": {"complevel": 4, "least_significant_digit": 2},
+        }
+
+        result = variable_encoding(output_dataset["Tair"], output_encoding)
+
+        assert result == {"zlib": True, "complevel": 4, "least_significant_digit": 2}
+
+    def test_variable_encoding_chunksizes(self, output_dataset):
+        """Test chunk sizes by dimension follow the variable's dimensions."""
+        output_encoding = {"default": {"chunksizes": {"time": 24, "lat": 1}}}
+
+        result = variable_encoding(output_dataset["Wind"], output_encoding)
+
+        assert result["chunksizes"] == (1, 2, 24)
+
+    def test_write_outputs_encoding(self, tmp_path, output_dataset):
+        """Test the configured encoding is used on disk."""
+        output_encoding = {"Wind": {"complevel": 1, "chunksizes": {"time": 12}}}
+
+        result = write_outputs(
+            output_dataset, str(tmp_path / "out"), output_encoding=output_encoding
+        )
+
+        with xr.open_dataset(result[1]) as ds:
+            assert ds["Wind"].encoding["complevel"] == 1
+            assert ds["Wind"].encoding["chunksizes"] == (2, 2, 12)
+
+
+class TestZarrOutputs:
+    """Test cases for the Zarr output backend."""
+
+    @pytest.fixture(autouse=True)
+    def require_zarr(self):
+        pytest.importorskip("zarr")
+
+    def test_write_outputs_zarr(self, tmp_path, output_dataset):
+        """Test each variable is written into its own chunked store."""
+        output_file = str(tmp_path / "out")
+        output_encoding = {"default": {"chunksizes": {"time": 12}}}
+
+        result = write_outputs(
+            output_dataset.chunk(time=24),
+            output_file,
+            output_encoding=output_encoding,
+            output_format="zarr",
+        )
+
+        assert result == [
+            output_file_name(output_file, v, "zarr") for v in ["Tair", "Wind"]
+        ]
+        ds = xr.open_zarr(result[0])
+        assert ds["Tair"].encoding["chunks"] == (2, 2, 12)
+        assert ds["Tair"].equals(output_dataset["Tair"])
+
+    def test_write_outputs_zarr_append(self, tmp_path, output_dataset):
+        """Test appending windows to a combined store."""
+        output_file = str(tmp_path / "out")
+
+        write_outputs(
+            output_dataset.isel(time=slice(0, 30)),
+            output_file,
+            combined=True,
+            output_format="zarr",
+        )
+        result = write_outputs(
+            output_dataset.isel(time=slice(30, None)),
+            output_file,
+            append=True,
+            combined=True,
+            output_format="zarr",
+        )
+
+        assert result == [combined_file_name(output_file, "zarr")]
+        assert open_outputs(result).equals(output_dataset)